@@ -0,0 +1,54 @@
+import gc
+import os
+import sys
+import random
+import argparse
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.synthetic import make_statement, render
+from statement_extractor import instrument
+
+# tracemalloc peak of the pdfplumber extractor as statements grow. In --low-memory mode the peak
+# should stay flat; the run exits non-zero if the largest statement's peak is more than
+# --max-growth times the smallest one's.
+DEFAULT_TRANSACTIONS = [50, 200, 800]
+
+
+def peak_bytes(extract, data, **options):
+    gc.collect()
+    with instrument.recording(trace_memory=True) as rec:
+        extract(data, **options)
+    return rec.memory_peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Peak memory of plumber extraction against page count.')
+    parser.add_argument('--transactions', type=int, nargs='+', default=DEFAULT_TRANSACTIONS,
+                        help='transactions per synthetic statement (more transactions, more pages)')
+    parser.add_argument('--mode', default='text', choices=['text', 'words', 'chars'])
+    parser.add_argument('--max-growth', type=float, default=2.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from plumber.extract_pdf_text import extract_pdf_data
+
+    print(f"{'pages':>6} {'default MB':>12} {'low-memory MB':>14}")
+    low_peaks = []
+    for n in args.transactions:
+        doc = render(make_statement(random.Random(args.seed), n))
+        data, pages = doc.tobytes(), doc.page_count
+        doc.close()
+        default = peak_bytes(extract_pdf_data, data, mode=args.mode)
+        low = peak_bytes(extract_pdf_data, data, mode=args.mode, low_memory=True)
+        low_peaks.append(low)
+        print(f"{pages:>6} {default / 2**20:>12.1f} {low / 2**20:>14.1f}")
+    growth = low_peaks[-1] / low_peaks[0]
+    print(f"\nlow-memory peak growth: {growth:.2f}x (limit {args.max_growth}x)")
+    return 0 if growth <= args.max_growth else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
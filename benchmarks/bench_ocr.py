@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from pdf2image.exceptions import PopplerNotInstalledError
+
+from benchmarks.synthetic import generate_corpus
+from tesseract_spacy.engines import ENGINES, get_engine
+from tesseract_spacy.extract_pdf_text import DEFAULT_DPI, iter_ocr_pages
+
+# Per-page latency and throughput of each OCR engine on scanned synthetic statements. Model
+# loading is timed separately in this process (forked workers inherit the loaded engine).
+
+
+def load_engine(name):
+    start = time.perf_counter()
+    get_engine(name)
+    return time.perf_counter() - start
+
+
+def bench_engine(name, pdf_paths, dpi, workers):
+    latencies = []
+    start = time.perf_counter()
+    for pdf_path in pdf_paths:
+        last = time.perf_counter()
+        for _ in iter_ocr_pages(pdf_path, dpi=dpi, workers=workers, engine=name):
+            now = time.perf_counter()
+            latencies.append(now - last)
+            last = now
+    return latencies, time.perf_counter() - start
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare OCR engines on scanned synthetic statements.')
+    parser.add_argument('-n', type=int, default=5, help='number of scanned statements')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: each engine's own default)")
+    parser.add_argument('--engines', nargs='+', default=sorted(ENGINES), choices=sorted(ENGINES))
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docs = generate_corpus(tmp, args.n, seed=args.seed, scanned_ratio=1)
+        pdf_paths = [doc['pdf'] for doc in docs]
+        print(f"{'engine':<12} {'load s':>8} {'pages':>6} {'p50 ms':>9} {'p95 ms':>9} {'pages/s':>9}")
+        for name in args.engines:
+            try:
+                load_seconds = load_engine(name)
+                latencies, seconds = bench_engine(name, pdf_paths, args.dpi, args.workers)
+            except (ImportError, OSError, PopplerNotInstalledError) as e:
+                # Missing package, or a missing tesseract/poppler binary
+                print(f"{name:<12} skipped ({e.__class__.__name__}: {e})")
+                continue
+            print(f"{name:<12} {load_seconds:>8.2f} {len(latencies):>6} {percentile(latencies, 0.5) * 1000:>9.1f} "
+                  f"{percentile(latencies, 0.95) * 1000:>9.1f} {len(latencies) / seconds:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import re
+import sys
+import time
+import argparse
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+SAMPLE_TEXT = os.path.join(ROOT_DIR, 'plumber', 'tdbank_text.txt')
+PAGE_MARKER_RE = re.compile(r'^--- Page \d+ ---$')
+
+
+def load_pages(path):
+    # tdbank_text.txt is pdfplumber output with "--- Page N ---" separators between pages
+    pages, current = [], []
+    with open(path, encoding='utf-8') as f:
+        for line in f.read().splitlines():
+            if PAGE_MARKER_RE.match(line.strip()):
+                if current:
+                    pages.append(current)
+                current = []
+            else:
+                current.append(line)
+    if current:
+        pages.append(current)
+    return pages
+
+
+def measure(label, fn, n_lines, repeat):
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {repeat / elapsed:>10.0f} docs/s {n_lines * repeat / elapsed:>12.0f} lines/s")
+    return n_lines * repeat / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Micro-benchmark of the text parsing stage (no PDF I/O).')
+    parser.add_argument('--input', default=SAMPLE_TEXT, help='pdfplumber text dump with page separators')
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    from plumber import extract_pdf_text as plumber
+    from tesseract_spacy import extract_pdf_text as tesseract
+
+    pages = load_pages(args.input)
+    lines = [line for page in pages for line in page]
+    print(f"{len(pages)} pages, {len(lines)} lines, {args.repeat} iterations\n")
+
+    def per_field():
+        # One scan per field, the shape of the extractor before the single-pass parser
+        plumber.extract_customer_info(lines)
+        plumber.extract_statement_period(lines)
+        plumber.extract_account_summary(lines)
+        plumber.extract_daily_balance_summary(lines)
+
+    measure('plumber single pass', lambda: plumber.parse_pages(pages), len(lines), args.repeat)
+    measure('plumber one scan per field', per_field, len(lines), args.repeat)
+    measure('tesseract_spacy parse', lambda: tesseract.parse_pages(pages), len(lines), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
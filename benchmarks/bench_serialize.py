@@ -0,0 +1,83 @@
+import io
+import os
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from statement_extractor.models import SERIALIZERS, Statement, dump, format_cents
+
+
+def make_results(n, rows, seed):
+    # Dict results in the extractors' shape, with `rows` daily balances each
+    rng = random.Random(seed)
+    results = []
+    for i in range(n):
+        balances = [{'date': f"01/{d % 28 + 1:02d}", 'balance': format_cents(rng.randrange(0, 10_000_000))}
+                    for d in range(rows)]
+        results.append({
+            'customer_name': f"CUSTOMER {i}",
+            'customer_address': ['1 MAIN ST', 'JAMESBURG NJ 08831', 'USA'],
+            'statement_period': 'Jan 01 2024-Jan 31 2024',
+            'account_summary': {'BeginningBalance': balances[0]['balance'], 'DaysinPeriod': '31',
+                                'EndingBalance': balances[-1]['balance']},
+            'daily_balance_summary': balances,
+        })
+    return results
+
+
+def measure_memory(build):
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Memory, size and speed of result dicts vs typed Statements.')
+    parser.add_argument('-n', type=int, default=20_000, help='number of statements')
+    parser.add_argument('--rows', type=int, default=50, help='daily balance rows per statement')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results, dict_bytes = measure_memory(lambda: make_results(args.n, args.rows, args.seed))
+    statements, typed_bytes = measure_memory(lambda: [Statement.from_result(r) for r in results])
+    print(f"{args.n} statements, {args.n * args.rows} daily rows\n")
+    print(f"{'in memory: dicts':<24} {dict_bytes / 2**20:>10.1f} MB")
+    print(f"{'in memory: Statement':<24} {typed_bytes / 2**20:>10.1f} MB\n")
+
+    def json_indent():
+        buf = io.StringIO()
+        for r in results:
+            buf.write(json.dumps(r, indent=2, ensure_ascii=False))
+        return buf.getvalue()
+
+    out, seconds = timed(json_indent)
+    print(f"{'json.dumps(indent=2)':<24} {len(out) / 2**20:>10.1f} MB {seconds:>8.2f} s")
+    for name, (_, _, binary) in SERIALIZERS.items():
+        buf = io.BytesIO() if binary else io.StringIO()
+        try:
+            _, seconds = timed(lambda: dump(statements, buf, name))
+        except ImportError as e:
+            print(f"{name:<24} skipped ({e})")
+            continue
+        print(f"{name:<24} {len(buf.getvalue()) / 2**20:>10.1f} MB {seconds:>8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import json
+import tempfile
+import argparse
+import subprocess
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.synthetic import generate_corpus
+from statement_extractor.cli import OCR_AND_ML_MODULES
+
+# Guards the cron fast path: extracting a digital statement must not import docling, torch or any
+# OCR module. Each method runs in a fresh interpreter through the CLI; exits non-zero on a leak.
+FAST_METHODS = ['pymupdf', 'pymupdf_layout', 'auto']
+
+
+def run_cli(method, pdf_path):
+    cmd = [sys.executable, '-m', 'statement_extractor', 'extract', '--method', method, '--no-cache',
+           '--import-report', pdf_path]
+    proc = subprocess.run(cmd, cwd=ROOT_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)} failed:\n{proc.stderr}")
+    return json.loads(proc.stderr.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check that the digital fast path stays free of OCR/ML imports.')
+    parser.add_argument('--methods', nargs='+', default=FAST_METHODS)
+    args = parser.parse_args(argv)
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = generate_corpus(tmp, n=1, seed=0, scanned_ratio=0)[0]['pdf']
+        for method in args.methods:
+            report = run_cli(method, pdf_path)
+            leaked = [name for name in report['heavy_modules'] if name in OCR_AND_ML_MODULES]
+            status = 'FAIL' if leaked else 'ok'
+            failures += bool(leaked)
+            print(f"{method:<16} {status:<5} import {report['import_seconds'] * 1000:>7.1f} ms  "
+                  f"loaded: {', '.join(report['heavy_modules']) or '-'}")
+            if leaked:
+                print(f"  imported {', '.join(leaked)}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import subprocess
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.synthetic import generate_corpus
+from statement_extractor.api import extract
+from statement_extractor.jobqueue import DONE, DEAD, open_queue
+from statement_extractor.worker import enqueue, make_payload
+
+# End-to-end check of the queue worker on one machine: several worker processes drain a SQLite
+# queue holding good statements, one of them also queued with a second method, a job whose worker
+# "crashed" (leased, never acked), a missing file and a payload with an unknown method. Every job's
+# result file must hold exactly what extract() returns for its method, the abandoned job must be
+# redelivered, and the two bad jobs dead-lettered.
+
+VISIBILITY_TIMEOUT = 1.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check at-least-once delivery and dead-lettering of the job queue.')
+    parser.add_argument('-n', type=int, default=6, help='number of statements')
+    parser.add_argument('--processes', type=int, default=3)
+    parser.add_argument('--method', default='pymupdf')
+    parser.add_argument('--second-method', default='plumber',
+                        help='method of the extra job for the first statement')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docs = generate_corpus(os.path.join(tmp, 'corpus'), args.n, seed=0, scanned_ratio=0)
+        queue_path = os.path.join(tmp, 'jobs.sqlite')
+        output_dir = os.path.join(tmp, 'results')
+        enqueue(queue_path, os.path.join(tmp, 'corpus'), method=args.method)
+        with open_queue(queue_path) as queue:
+            second = queue.put(make_payload(docs[0]['pdf'], args.second_method))
+            queue.put(make_payload(os.path.join(tmp, 'missing.pdf'), args.method))
+            queue.put(make_payload(docs[0]['pdf'], 'no-such-method'))
+            abandoned = queue.get(VISIBILITY_TIMEOUT)
+        time.sleep(VISIBILITY_TIMEOUT * 1.5)
+
+        cmd = [sys.executable, '-m', 'statement_extractor', 'queue', '--queue', queue_path, 'work',
+               '--output-dir', output_dir, '--processes', str(args.processes), '--drain', '--no-cache',
+               '--max-attempts', '2', '--retry-delay', '0', '--visibility-timeout', str(VISIBILITY_TIMEOUT)]
+        start = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=ROOT_DIR, capture_output=True, text=True)
+        seconds = time.perf_counter() - start
+        sys.stderr.write(proc.stderr)
+
+        failures = []
+        with open_queue(queue_path) as queue:
+            counts = queue.counts()
+            dead = queue.dead_letters()
+            rows = {row[0]: row[1:] for row in
+                    queue.conn.execute('SELECT id, status, attempts, payload, result FROM jobs')}
+        if counts.get(DONE) != args.n + 1 or counts.get(DEAD) != 2:
+            failures.append(f"expected {args.n + 1} done and 2 dead, got {counts}")
+        if rows[abandoned.id][:2] != (DONE, 2):
+            failures.append(f"abandoned job {abandoned.id} was not redelivered: {rows[abandoned.id][:2]}")
+        outputs = {}
+        for job_id, (status, _, payload, result) in rows.items():
+            if status != DONE:
+                continue
+            payload, output = json.loads(payload), json.loads(result)['output']
+            outputs[job_id] = output
+            expected = json.loads(json.dumps(extract(payload['pdf'], method=payload['method'])))
+            with open(output, encoding='utf-8') as f:
+                if json.load(f)['data'] != expected:
+                    failures.append(f"job {job_id} ({payload['method']} {payload['pdf']}): result differs")
+        first = next(job_id for job_id, row in rows.items()
+                     if json.loads(row[2]) == make_payload(docs[0]['pdf'], args.method))
+        if outputs.get(first) == outputs.get(second):
+            failures.append(f"{args.method} and {args.second_method} jobs for {docs[0]['pdf']} share a result file")
+        print(f"{args.n + 3} jobs, {args.processes} workers, {seconds:.2f} s: {counts}; "
+              f"dead: {[(job['payload']['pdf'], job['error']) for job in dead]}")
+        for failure in failures:
+            print(f"  FAIL {failure}", file=sys.stderr)
+    return 1 if failures or proc.returncode else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import tempfile
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.synthetic import generate_corpus
+
+ALL_METHODS = ['plumber', 'pymupdf', 'pymupdf_layout', 'tesseract', 'docling', 'ensemble']
+FIELDS = ['customer_name', 'customer_address', 'statement_period', 'account_summary',
+          'daily_balance_summary', 'checks']
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def _rows(value, keys):
+    return sorted(tuple(str(row.get(k)).strip() for k in keys) for row in value or [])
+
+
+def score_fields(result, truth):
+    # Fraction correct per field; fields the method does not produce are left out
+    scores = {}
+    for field in FIELDS:
+        if field not in result:
+            continue
+        got, want = result[field], truth[field]
+        if field == 'account_summary':
+            got = got or {}
+            scores[field] = sum(got.get(k) == v for k, v in want.items()) / len(want)
+        elif field == 'daily_balance_summary':
+            scores[field] = float(_rows(got, ('date', 'balance')) == _rows(want, ('date', 'balance')))
+        elif field == 'checks':
+            scores[field] = float(_rows(got, ('date', 'amount')) == _rows(want, ('date', 'amount')))
+        else:
+            scores[field] = float(got == want)
+    return scores
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _run_method(method, documents):
+    # Runs in a fresh process so import cost and peak RSS belong to this method alone
+    from statement_extractor.api import load_method
+    start = time.perf_counter()
+    module = load_method(method)
+    import_seconds = time.perf_counter() - start
+    kwargs, setup_seconds = {}, 0.0
+    if method == 'docling':
+        start = time.perf_counter()
+        kwargs['converter'] = module.DocumentConverter()
+        setup_seconds = time.perf_counter() - start
+    if method == 'ensemble':
+        # A failed fast or escalation method is an error here, not a quietly degraded result
+        kwargs['strict'] = True
+    samples = []
+    for doc in documents:
+        with open(doc['truth'], encoding='utf-8') as f:
+            truth = json.load(f)
+        start = time.perf_counter()
+        try:
+            result, error = module.extract_pdf_data(doc['pdf'], **kwargs), None
+        except Exception as e:
+            result, error = None, f"{type(e).__name__}: {e}"
+        seconds = time.perf_counter() - start
+        samples.append({'pdf': os.path.basename(doc['pdf']), 'pages': doc['pages'], 'scanned': doc['scanned'],
+                        'seconds': seconds, 'error': error,
+                        'accuracy': score_fields(result, truth) if result is not None else {}})
+    return {'import_seconds': import_seconds, 'setup_seconds': setup_seconds,
+            'peak_rss_mb': _peak_rss_mb(), 'samples': samples}
+
+
+def summarize(samples):
+    ok = [s for s in samples if s['error'] is None]
+    latencies = [s['seconds'] for s in ok]
+    total_seconds = sum(latencies)
+    accuracy = {}
+    for field in FIELDS:
+        values = [s['accuracy'][field] for s in ok if field in s['accuracy']]
+        if values:
+            accuracy[field] = round(sum(values) / len(values), 4)
+    return {
+        'documents': len(samples),
+        'errors': len(samples) - len(ok),
+        'p50_seconds': percentile(latencies, 50),
+        'p95_seconds': percentile(latencies, 95),
+        'mean_seconds': total_seconds / len(ok) if ok else None,
+        'pages_per_second': sum(s['pages'] for s in ok) / total_seconds if total_seconds else None,
+        'accuracy': accuracy,
+    }
+
+
+def run_benchmark(documents, methods):
+    report = {}
+    ctx = multiprocessing.get_context('spawn')
+    for method in methods:
+        print(f"[bench] {method}: {len(documents)} documents", file=sys.stderr)
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+            try:
+                raw = executor.submit(_run_method, method, documents).result()
+            except Exception as e:
+                # Typically the backend's dependencies are not installed here
+                report[method] = {'skipped': f"{type(e).__name__}: {e}"}
+                continue
+        samples = raw.pop('samples')
+        entry = dict(raw)
+        entry['all'] = summarize(samples)
+        for kind, scanned in (('digital', False), ('scanned', True)):
+            subset = [s for s in samples if s['scanned'] == scanned]
+            if subset:
+                entry[kind] = summarize(subset)
+        entry['samples'] = samples
+        report[method] = entry
+    return report
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def find_regressions(report, baseline, tolerance):
+    # A method regresses when p50 latency grows by more than `tolerance` or any field loses accuracy
+    regressions = []
+    for method, entry in report['methods'].items():
+        old = baseline.get('methods', {}).get(method)
+        if not old or 'all' not in old or 'all' not in entry:
+            continue
+        new_p50, old_p50 = entry['all']['p50_seconds'], old['all']['p50_seconds']
+        if new_p50 and old_p50 and new_p50 > old_p50 * (1 + tolerance):
+            regressions.append(f"{method}: p50 {old_p50:.4f}s -> {new_p50:.4f}s")
+        for field, old_acc in old['all']['accuracy'].items():
+            new_acc = entry['all']['accuracy'].get(field)
+            if new_acc is not None and new_acc < old_acc:
+                regressions.append(f"{method}: {field} accuracy {old_acc:.3f} -> {new_acc:.3f}")
+    return regressions
+
+
+def print_table(report):
+    print(f"{'method':<10} {'kind':<8} {'docs':>5} {'err':>4} {'p50 s':>8} {'p95 s':>8} {'pages/s':>9} {'RSS MB':>8}")
+    for method, entry in report['methods'].items():
+        if 'skipped' in entry:
+            print(f"{method:<10} skipped: {entry['skipped']}")
+            continue
+        for kind in ('digital', 'scanned', 'all'):
+            if kind not in entry:
+                continue
+            m = entry[kind]
+            fmt = lambda v, spec: format(v, spec) if v is not None else '-'.rjust(int(spec.split('.')[0]))
+            print(f"{method:<10} {kind:<8} {m['documents']:>5} {m['errors']:>4} {fmt(m['p50_seconds'], '8.4f')} "
+                  f"{fmt(m['p95_seconds'], '8.4f')} {fmt(m['pages_per_second'], '9.1f')} {entry['peak_rss_mb']:>8.1f}")
+        print(f"{'':<10} accuracy {json.dumps(entry['all']['accuracy'])}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the extraction methods on a synthetic statement corpus.')
+    parser.add_argument('-n', type=int, default=20, help='number of synthetic statements')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scanned-ratio', type=float, default=0.2)
+    parser.add_argument('--methods', default=','.join(ALL_METHODS), help='comma separated subset of methods')
+    parser.add_argument('--corpus-dir', help='keep the generated corpus here (default: temporary directory)')
+    parser.add_argument('--output', default='bench_results.json', help='where to write the JSON report')
+    parser.add_argument('--baseline', help='previous JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative p50 slowdown before --baseline reports a regression')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    methods = [m.strip() for m in args.methods.split(',') if m.strip()]
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_dir = args.corpus_dir or tmp
+        documents = generate_corpus(corpus_dir, args.n, args.seed, args.scanned_ratio)
+        report = {
+            'meta': {
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'commit': _git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'n': args.n, 'seed': args.seed, 'scanned_ratio': args.scanned_ratio,
+            },
+            'methods': run_benchmark(documents, methods),
+        }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print_table(report)
+    print(f"\nReport written to {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = find_regressions(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
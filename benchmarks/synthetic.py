@@ -0,0 +1,285 @@
+import os
+import json
+import random
+import argparse
+import calendar
+
+import fitz  # PyMuPDF
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+FONT_SIZE = 8
+ROW_HEIGHT = 12
+BODY_TOP, BODY_BOTTOM = 160, 720
+# Words of a label are placed with a gap narrower than pdfplumber's x_tolerance but wide enough
+# for PyMuPDF to insert a space, which reproduces the real TD text layer: pdfplumber reads
+# "StatementPeriod:" while PyMuPDF reads "Statement Period:".
+LABEL_GAP = 1.5
+FOOTER = 'Call 1-800-937-2000 for 24-hour Bank-by-Phone services or connect to www.tdbank.com'
+SCANNED_DPI = 150
+
+FIRST_NAMES = ['GULSUM', 'AIDAR', 'PRIYA', 'JOHN', 'MARIA', 'ARJUN', 'DANA', 'SAMUEL']
+LAST_NAMES = ['NIZAMOVA', 'SMITH', 'KUMAR', 'OKAFOR', 'GARCIA', 'IVANOV', 'CHEN', 'BROWN']
+STREETS = ['ULITSA BENZINNAYA', '12 MAPLE AVENUE', '230 FORSGATE DRIVE', 'MG ROAD 45', 'PROSPEKT ABAYA 7']
+PLACES = {
+    'KAZAKHSTAN': ['KARAGANDY 100000', 'ALMATY 050000'],
+    'USA': ['JAMESBURG NJ 08831', 'NEWARK NJ 07102'],
+    'INDIA': ['BENGALURU 560001', 'PUNE 411001'],
+}
+MERCHANTS = ['LAPALMADELI JAMESBURG *NJ', 'AMAZONCOMMK6LI0NL2AMZ AMZNCOMBILL*WA', 'APPLECOMBILL 8667127753 *CA',
+             'DUNKIN 335022Q35 JAMESBURG *NJ', 'NETFLIXCOM NETFLIXCOM *CA', 'SHOPRITESPOTSWOODS1 SPOTSWOOD *NJ']
+CARD_NUMBER = '4085404025400841'
+
+
+def money(cents):
+    return f"{cents / 100:,.2f}"
+
+
+def _write_label(page, x, y, text):
+    for word in text.split(' '):
+        page.insert_text((x, y), word, fontsize=FONT_SIZE)
+        x += fitz.get_text_length(word, fontsize=FONT_SIZE) + LABEL_GAP
+
+
+def _write(page, x, y, text):
+    page.insert_text((x, y), text, fontsize=FONT_SIZE)
+
+
+def make_statement(rng, n_transactions):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    country = rng.choice(sorted(PLACES))
+    address = [rng.choice(STREETS), rng.choice(PLACES[country]), country]
+    year, month = rng.randint(2019, 2024), rng.randint(1, 12)
+    days = calendar.monthrange(year, month)[1]
+    mon = calendar.month_abbr[month]
+    period = f"{mon} 01 {year}-{mon} {days} {year}"
+    account = f"{rng.randint(100, 999)}-{rng.randint(1000000, 9999999)}"
+
+    sections = {'Electronic Deposits': [], 'Electronic Payments': [], 'Service Charges': []}
+    for _ in range(n_transactions):
+        day = rng.randint(1, days)
+        auth = f"{month:02d}{max(1, day - 1):02d}{year % 100:02d}"
+        kind = rng.random()
+        if kind < 0.3:
+            if rng.random() < 0.6:
+                row = ('ATM CHECK DEPOSIT, AUT %s ATM CHECK DEPOSI' % auth,
+                       ['230FORSGATEDR JAMESBURG *NJ', CARD_NUMBER], rng.randint(2000, 90000))
+            else:
+                row = ('ACH DEPOSIT, STATE OF NJ-LAU EMPLOYMEN', [], rng.randint(10000, 150000))
+            sections['Electronic Deposits'].append((day,) + row)
+        else:
+            row = ('DEBIT CARD PURCHASE, AUT %s VISA DDA PUR' % auth, [rng.choice(MERCHANTS), CARD_NUMBER],
+                   rng.randint(99, 25000))
+            sections['Electronic Payments'].append((day,) + row)
+    sections['Service Charges'] = [(days, 'MAINTENANCE FEE', [], 2500), (days, 'PAPER STATEMENT FEE', [], 300)]
+    for rows in sections.values():
+        rows.sort(key=lambda r: r[0])
+
+    deposits = sum(r[3] for r in sections['Electronic Deposits'])
+    payments = sum(r[3] for r in sections['Electronic Payments'])
+    charges = sum(r[3] for r in sections['Service Charges'])
+    beginning = rng.randint(payments + charges, payments + charges + 500000)
+    ending = beginning + deposits - payments - charges
+
+    deltas = {}
+    for title, rows in sections.items():
+        sign = 1 if title == 'Electronic Deposits' else -1
+        for day, _, _, amount in rows:
+            deltas[day] = deltas.get(day, 0) + sign * amount
+    prev_month, prev_year = (month - 1, year) if month > 1 else (12, year - 1)
+    prev_day = calendar.monthrange(prev_year, prev_month)[1]
+    daily = [(f"{prev_month:02d}/{prev_day:02d}", beginning)]
+    balance = beginning
+    for day in sorted(deltas):
+        balance += deltas[day]
+        daily.append((f"{month:02d}/{day:02d}", balance))
+
+    summary = [
+        ('Beginning Balance', money(beginning)), ('Average Collected Balance', money((beginning + ending) // 2)),
+        ('Electronic Deposits', money(deposits)), ('Interest Earned This Period', '0.00'),
+        ('Interest Paid Year-to-Date', '0.00'), ('Electronic Payments', money(payments)),
+        ('Annual Percentage Yield Earned', '0.00%'), ('Service Charges', money(charges)),
+        ('Days in Period', str(days)), ('Ending Balance', money(ending)),
+    ]
+    return {
+        'customer_name': name,
+        'customer_address': address,
+        'statement_period': period,
+        'cust_ref': f"{account.replace('-', '')}-717-T-###",
+        'account_number': account,
+        'account_summary': summary,
+        'sections': sections,
+        'daily_balances': [(date, money(b)) for date, b in daily],
+        'month': month,
+    }
+
+
+def ground_truth(stmt):
+    month = stmt['month']
+    transactions = [{'section': title, 'date': f"{month:02d}/{day:02d}", 'description': desc, 'amount': money(amount)}
+                    for title, rows in stmt['sections'].items() for day, desc, _, amount in rows]
+    return {
+        'customer_name': stmt['customer_name'],
+        'customer_address': stmt['customer_address'],
+        'statement_period': stmt['statement_period'],
+        'account_summary': {k.replace(' ', ''): v for k, v in stmt['account_summary']},
+        'daily_balance_summary': [{'date': d, 'balance': b} for d, b in stmt['daily_balances']],
+        'checks': [{'date': t['date'], 'amount': t['amount']} for t in transactions if 'CHECK DEPOSIT' in t['description']],
+        'transactions': transactions,
+    }
+
+
+def _page_header(page, stmt, first):
+    # Page numbers are filled in once the page count is known. On page 1 the address block is
+    # written before the right-hand column so PyMuPDF reads it as consecutive lines.
+    _write_label(page, 40, 60, 'STATEMENT OF ACCOUNT')
+    block = [stmt['customer_name']] + (stmt['customer_address'] if first else [])
+    for i, line in enumerate(block):
+        _write(page, 40, 80 + i * ROW_HEIGHT, line)
+    _write_label(page, 300, 80, 'Page:')
+    _write_label(page, 300, 92, 'Statement Period:')
+    _write_label(page, 300, 104, 'Cust Ref #:')
+    _write_label(page, 300, 128, 'Primary Account #:')
+    _write(page, 400, 92, stmt['statement_period'])
+    _write(page, 400, 104, stmt['cust_ref'])
+    _write(page, 400, 128, stmt['account_number'])
+    if first:
+        _write(page, 40, 150, 'TD Business Convenience Plus')
+
+
+def render(stmt):
+    doc = fitz.open()
+
+    def new_page():
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        _page_header(page, stmt, doc.page_count == 1)
+        _write(page, 40, 740, FOOTER)
+        return page, BODY_TOP
+
+    page, y = new_page()
+    _write_label(page, 40, y, 'ACCOUNT SUMMARY')
+    y += ROW_HEIGHT
+    summary = list(stmt['account_summary'])
+    # Two-column summary block, keys with long values stand alone like on the real statement
+    layout = [(0, 1), (2, 3), (4, None), (5, 6), (7, 8), (9, None)]
+    for left, right in layout:
+        key, value = summary[left]
+        _write_label(page, 40, y, key)
+        _write(page, 200, y, value)
+        if right is not None:
+            key, value = summary[right]
+            _write_label(page, 300, y, key)
+            _write(page, 480, y, value)
+        y += ROW_HEIGHT
+
+    y += ROW_HEIGHT // 2
+    _write_label(page, 40, y, 'DAILY ACCOUNT ACTIVITY')
+    y += ROW_HEIGHT
+    month = stmt['month']
+    for title, rows in stmt['sections'].items():
+        if not rows:
+            continue
+        if y + 3 * ROW_HEIGHT > BODY_BOTTOM:
+            page, y = new_page()
+            _write_label(page, 40, y, 'DAILY ACCOUNT ACTIVITY')
+            y += ROW_HEIGHT
+        _write_label(page, 40, y, title)
+        y += ROW_HEIGHT
+        _write_label(page, 40, y, 'POSTING DATE')
+        _write_label(page, 120, y, 'DESCRIPTION')
+        _write_label(page, 520, y, 'AMOUNT')
+        y += ROW_HEIGHT
+        for day, desc, extra, amount in rows:
+            if y + (1 + len(extra)) * ROW_HEIGHT > BODY_BOTTOM:
+                page, y = new_page()
+                _write_label(page, 40, y, 'DAILY ACCOUNT ACTIVITY')
+                y += ROW_HEIGHT
+                _write_label(page, 40, y, title + ' (continued)')
+                y += ROW_HEIGHT
+                _write_label(page, 40, y, 'POSTING DATE')
+                _write_label(page, 120, y, 'DESCRIPTION')
+                _write_label(page, 520, y, 'AMOUNT')
+                y += ROW_HEIGHT
+            _write(page, 40, y, f"{month:02d}/{day:02d}")
+            _write(page, 120, y, desc)
+            _write(page, 520, y, money(amount))
+            y += ROW_HEIGHT
+            for line in extra:
+                _write(page, 120, y, line)
+                y += ROW_HEIGHT
+        _write_label(page, 40, y, 'Subtotal:')
+        _write(page, 520, y, money(sum(r[3] for r in rows)))
+        y += ROW_HEIGHT
+
+    page, y = new_page()
+    _write_label(page, 40, y, 'DAILY BALANCE SUMMARY')
+    y += ROW_HEIGHT
+    for x in (40, 300):
+        _write_label(page, x, y, 'DATE')
+        _write_label(page, x + 60, y, 'BALANCE')
+    y += ROW_HEIGHT
+    daily = stmt['daily_balances']
+    half = (len(daily) + 1) // 2
+    for left, right in zip(daily[:half], daily[half:] + [None]):
+        for x, cell in ((40, left), (300, right)):
+            if cell is not None:
+                _write(page, x, y, cell[0])
+                _write(page, x + 60, y, cell[1])
+        y += ROW_HEIGHT
+
+    total = doc.page_count
+    for page in doc:
+        _write(page, 330, 80, f"{page.number + 1} of {total}")
+    return doc
+
+
+def rasterize(doc, dpi=SCANNED_DPI):
+    # A "scanned" statement keeps the page geometry but has no text layer
+    scanned = fitz.open()
+    for page in doc:
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+        out = scanned.new_page(width=page.rect.width, height=page.rect.height)
+        out.insert_image(out.rect, pixmap=pix)
+    return scanned
+
+
+def generate_corpus(out_dir, n=20, seed=0, scanned_ratio=0.2, min_transactions=5, max_transactions=120):
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    manifest = []
+    for i in range(n):
+        stmt = make_statement(rng, rng.randint(min_transactions, max_transactions))
+        scanned = rng.random() < scanned_ratio
+        doc = render(stmt)
+        if scanned:
+            doc = rasterize(doc)
+        name = f"stmt_{i:04d}"
+        pdf_path = os.path.join(out_dir, name + '.pdf')
+        truth_path = os.path.join(out_dir, name + '.truth.json')
+        pages = doc.page_count
+        doc.save(pdf_path, garbage=3, deflate=True)
+        doc.close()
+        with open(truth_path, 'w', encoding='utf-8') as f:
+            json.dump(ground_truth(stmt), f, indent=2, ensure_ascii=False)
+        manifest.append({'pdf': pdf_path, 'truth': truth_path, 'pages': pages, 'scanned': scanned})
+    with open(os.path.join(out_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump({'seed': seed, 'documents': manifest}, f, indent=2)
+    return manifest
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate synthetic TD-style statements with ground truth.')
+    parser.add_argument('out_dir')
+    parser.add_argument('-n', type=int, default=20, help='number of statements')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scanned-ratio', type=float, default=0.2,
+                        help='fraction of statements rendered as image-only scans')
+    parser.add_argument('--min-transactions', type=int, default=5)
+    parser.add_argument('--max-transactions', type=int, default=120)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    docs = generate_corpus(args.out_dir, args.n, args.seed, args.scanned_ratio,
+                           args.min_transactions, args.max_transactions)
+    print(f"Wrote {len(docs)} statements ({sum(d['scanned'] for d in docs)} scanned) to {args.out_dir}")
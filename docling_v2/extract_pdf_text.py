@@ -1,51 +1,68 @@
 import os
+import sys
 import json
+import io
 import re
-from docling.document_converter import DocumentConverter
+import argparse
+from docling.datamodel.base_models import DocumentStream, InputFormat
+from docling.datamodel.pipeline_options import PdfPipelineOptions, TableFormerMode
+from docling.document_converter import DocumentConverter, PdfFormatOption
 import time
 
-PDF_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'tdbank.pdf')
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+from statement_extractor.cache import ResultCache, cached_extract
+from statement_extractor import instrument
+from statement_extractor.instrument import span, count
+from statement_extractor.source import is_path
+from statement_extractor import fields as field_pages
+from statement_extractor import templates
+from statement_extractor.templates import TD_BANK, squash
 
-SUMMARY_KEYS = [
-    'Beginning Balance', 'Average Collected Balance', 'Electronic Deposits',
-    'Interest Earned This Period', 'Interest Paid Year-to-Date', 'Electronic Payments',
-    'Annual Percentage Yield Earned', 'Service Charges', 'Days in Period', 'Ending Balance'
-]
+PDF_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'tdbank.pdf')
+EXTRACTOR_NAME = 'docling_v2'
+EXTRACTOR_VERSION = '1'
+FIELDS = ('customer_name', 'customer_address', 'statement_period', 'account_summary', 'checks')
+PIPELINES = ('default', 'fast')
+# Same threshold as the auto router: below this many text-layer characters a page is OCR'd
+MIN_TEXT_CHARS = 20
 
-SUMMARY_HEADER = 'ACCOUNT SUMMARY'
-ACTIVITY_HEADER = 'DAILY ACCOUNT ACTIVITY'
-SECTION_HEADERS = [
-    'ACCOUNT SUMMARY', 'DAILY ACCOUNT ACTIVITY', 'STATEMENT OF ACCOUNT',
-    'Electronic Deposits', 'Electronic Payments', 'Service Charges', 'DAILY BALANCE SUMMARY'
-]
+# TD Bank names; the parsers read these from the template picked for each statement
+SUMMARY_KEYS = TD_BANK.summary_keys
+SUMMARY_HEADER = TD_BANK.summary_header
+ACTIVITY_HEADER = TD_BANK.activity_header
+SECTION_HEADERS = TD_BANK.section_headers
 
-SECTION_HEADER_SET = set([h.upper() for h in SECTION_HEADERS])
-def is_section_header(line):
-    return line.strip().upper() in SECTION_HEADER_SET
+SECTION_HEADER_SET = TD_BANK.section_header_set
+def is_section_header(line, template=TD_BANK):
+    return line.strip().upper() in template.section_header_set
 
-def is_name_candidate(line):
+def is_name_candidate(line, template=TD_BANK):
     l = line.strip()
-    return l.isupper() and 'STATEMENT' not in l and not is_section_header(l) and len(l.split()) >= 2
+    return l.isupper() and 'STATEMENT' not in l and not is_section_header(l, template) and len(l.split()) >= 2
 
 def is_money(val):
     # Accept only plausible monetary values: must have decimal, be <12 chars, and only digits, commas, or dot
     return bool(re.match(r'^[0-9,.]+$', val)) and '.' in val and len(val) < 12
 
-def extract_customer_info(lines):
-    if 'Page:' in lines:
-        idx = lines.index('Page:')
+def extract_customer_info(lines, template=TD_BANK):
+    countries = template.countries
+    if template.name_anchor in lines:
+        idx = lines.index(template.name_anchor)
         name = None
         for i in range(idx-1, -1, -1):
             l = lines[i].strip()
-            if is_name_candidate(l):
+            if is_name_candidate(l, template):
                 name = l
                 break
         address = [lines[j].strip() for j in range(0, i)]
-        address = [l for l in address if l and l != name and 'TD Business Convenience Plus' not in l and not is_name_candidate(l)]
+        address = [l for l in address if l and l != name and not any(p in l for p in template.product_names)
+                   and not is_name_candidate(l, template)]
         print(f"[DEBUG] Full address list before processing: {address!r}")
         out_address = []
-        # If address is empty or only contains 'KAZAKHSTAN', try to extract from the name line
-        if not address or (len(address) == 1 and address[0].upper() == 'KAZAKHSTAN'):
+        # If address is empty or only contains the country, try to extract from the name line
+        if not address or (len(address) == 1 and address[0].upper() in countries):
             # Search for a line that starts with the name and has more content
             for line in lines:
                 if name and line.startswith(name) and len(line) > len(name) + 5:
@@ -76,9 +93,9 @@ def extract_customer_info(lines):
                         if rest:
                             out_address.append(rest)
                     break
-            # Add 'KAZAKHSTAN' if present in lines
+            # Add the country if present in lines
             for l in lines:
-                if l.strip().upper() == 'KAZAKHSTAN' and l.strip() not in out_address:
+                if l.strip().upper() in countries and l.strip() not in out_address:
                     out_address.append(l.strip())
         else:
             if address:
@@ -130,30 +147,31 @@ def extract_customer_info(lines):
         return name, out_address
     return None, []
 
-def extract_statement_period(lines):
+def extract_statement_period(lines, template=TD_BANK):
     date_pattern = re.compile(r'([A-Za-z]{3,9} \d{1,2} \d{4}-[A-Za-z]{3,9} \d{1,2} \d{4})')
+    label = template.period_label + ':'
     for i, line in enumerate(lines):
-        if 'Statement Period:' in line:
+        if label in line:
             for j in range(i+1, len(lines)):
                 val = lines[j].strip()
-                if not val or val in ('Cust Ref #:', 'Primary Account #:'):
+                if not val or val in template.label_values:
                     continue
                 m = date_pattern.search(val)
                 if m:
                     return m.group(1)
     return None
 
-def extract_account_summary_from_lines(lines):
+def extract_account_summary_from_lines(lines, template=TD_BANK):
     summary = {}
     in_summary = False
     for i, line in enumerate(lines):
-        if SUMMARY_HEADER in line:
+        if template.summary_header in line:
             in_summary = True
             continue
         if in_summary:
-            if ACTIVITY_HEADER in line:
+            if template.activity_header in line:
                 break
-            for key in SUMMARY_KEYS:
+            for key in template.summary_keys:
                 if key in line:
                     after = line.split(key, 1)[-1].strip()
                     if after and re.match(r'^[0-9,.%-]+$', after.split()[0]):
@@ -166,12 +184,12 @@ def extract_account_summary_from_lines(lines):
                             break
     return summary
 
-def extract_account_summary_from_tables(tables):
+def extract_account_summary_from_tables(tables, template=TD_BANK):
     summary = {}
     for table in tables:
         for row in table.get('rows', []):
             for i, cell in enumerate(row):
-                for key in SUMMARY_KEYS:
+                for key in template.summary_keys:
                     if key in cell:
                         if i+1 < len(row):
                             val = row[i+1].strip()
@@ -179,10 +197,10 @@ def extract_account_summary_from_tables(tables):
                                 summary[key.replace(' ', '')] = val
     return summary
 
-def extract_checks_from_lines(lines):
+def extract_checks_from_lines(lines, template=TD_BANK):
     checks = []
-    if ACTIVITY_HEADER in lines:
-        idx = lines.index(ACTIVITY_HEADER)
+    if template.activity_header in lines:
+        idx = lines.index(template.activity_header)
         section = lines[idx:]
         try:
             amount_idx = section.index('AMOUNT')
@@ -193,20 +211,15 @@ def extract_checks_from_lines(lines):
             for l in section[amount_idx+1:]:
                 if is_money(l.strip()):
                     amounts.append(l.strip())
-        # For each ATM CHECK DEPOSIT line, look backwards for the nearest unused date line
-        date_indices = [i for i, l in enumerate(section[:amount_idx if amount_idx is not None else len(section)]) if re.match(r'\d{2}/\d{2}', l.strip())]
-        used_dates = set()
+        # For each template.check_pair_label (ATM CHECK DEPOSIT) line, take the nearest unused date line above it.
+        # Unused dates are kept on a stack, so the nearest one is always on top.
+        unused_dates = []
         pairs = []
-        for i, l in enumerate(section[:amount_idx if amount_idx is not None else len(section)]):
-            if 'ATM CHECK DEPOSIT' in l:
-                # Look backwards for nearest unused date line
-                for j in reversed(date_indices):
-                    if j < i and j not in used_dates:
-                        date = section[j].strip()
-                        desc = l.strip()
-                        pairs.append((date, desc))
-                        used_dates.add(j)
-                        break
+        for l in section[:amount_idx if amount_idx is not None else len(section)]:
+            if template.check_pair_label in l and unused_dates:
+                pairs.append((unused_dates.pop(), l.strip()))
+            if re.match(r'\d{2}/\d{2}', l.strip()):
+                unused_dates.append(l.strip())
         # Pair in order with amounts
         for (date, desc), amount in zip(pairs, amounts):
             checks.append({
@@ -216,13 +229,13 @@ def extract_checks_from_lines(lines):
             })
     return checks
 
-def extract_checks_from_tables(tables):
+def extract_checks_from_tables(tables, template=TD_BANK):
     checks = []
     for table in tables:
         for row in table.get('rows', []):
             if len(row) >= 3:
                 date, desc, amount = row[0], row[1], row[2]
-                if re.match(r'\d{2}/\d{2}', date) and 'CHECK DEPOSIT' in desc:
+                if re.match(r'\d{2}/\d{2}', date) and template.check_label in desc:
                     # Prefer the first number after the description as amount
                     amt_match = re.search(r'([0-9,.]+)', amount)
                     amt_val = amt_match.group(1) if amt_match and is_money(amt_match.group(1)) else (amount.strip() if is_money(amount.strip()) else None)
@@ -244,23 +257,32 @@ def get_tables(docling_tables):
             tables.append({'rows': rows})
     return tables
 
-def main():
-    start = time.time()
-    converter = DocumentConverter()
-    result = converter.convert(PDF_PATH)
-    lines = [item.text for item in result.document.texts if hasattr(item, 'text')]
-    name, address = extract_customer_info(lines)
-    statement_period = extract_statement_period(lines)
-    account_summary = extract_account_summary_from_lines(lines)
-    checks = extract_checks_from_lines(lines)
+def document_lines(document):
+    return [item.text for item in document.texts if hasattr(item, 'text')]
+
+def parse_document(document, template=None):
+    return parse_parts(document_lines(document), getattr(document, 'tables', []), template)
+
+def parse_parts(lines, docling_tables, template=None):
+    # `docling_tables` may come from several partial conversions (see convert_fast)
+    template = templates.get_template(template) if template else templates.identify(lines)
+    tables = None
+    def document_tables():
+        # Table grids are built on first use and shared by the summary and checks fallbacks
+        nonlocal tables
+        if tables is None:
+            tables = get_tables(docling_tables)
+        return tables
+    name, address = extract_customer_info(lines, template)
+    statement_period = extract_statement_period(lines, template)
+    account_summary = extract_account_summary_from_lines(lines, template)
+    checks = extract_checks_from_lines(lines, template)
     if not account_summary or all(v is None for v in account_summary.values()):
-        tables = get_tables(getattr(result.document, 'tables', []))
-        table_summary = extract_account_summary_from_tables(tables)
+        table_summary = extract_account_summary_from_tables(document_tables(), template)
         if table_summary:
             account_summary = table_summary
     if not checks or any(c['amount'] is None for c in checks):
-        tables = get_tables(getattr(result.document, 'tables', []))
-        table_checks = extract_checks_from_tables(tables)
+        table_checks = extract_checks_from_tables(document_tables(), template)
         if table_checks:
             checks_out = []
             for c in checks:
@@ -281,9 +303,113 @@ def main():
         'account_summary': account_summary,
         'checks': checks
     }
+    return lines, result_json
+
+def to_source(pdf_path):
+    # A DocumentStream is consumed by a conversion, so buffers get a fresh one per call
+    return pdf_path if is_path(pdf_path) else DocumentStream(name='statement.pdf', stream=io.BytesIO(pdf_path))
+
+# Fast profile: one converter per (ocr, table structure) combination, built on first use and
+# kept for the life of the process so its models load once
+_FAST_CONVERTERS = {}
+
+def fast_converter(ocr, tables):
+    key = (ocr, tables)
+    if key not in _FAST_CONVERTERS:
+        options = PdfPipelineOptions()
+        options.do_ocr = ocr
+        options.do_table_structure = tables
+        options.table_structure_options.mode = TableFormerMode.FAST
+        options.table_structure_options.do_cell_matching = True
+        _FAST_CONVERTERS[key] = DocumentConverter(
+            format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=options)})
+    return _FAST_CONVERTERS[key]
+
+def plan_fast(pdf_path, fields=None, template=None):
+    # Reads the text layer with PyMuPDF to decide, per page, whether docling needs OCR (no text
+    # layer) and table structure (the ACCOUNT SUMMARY or DAILY ACCOUNT ACTIVITY header is on it).
+    # Consecutive pages with the same needs are merged into one (first, last, ocr, tables) run.
+    from pymupdf_method.extract_pdf_text import open_document
+    with open_document(pdf_path) as doc:
+        indices = field_pages.page_indices(fields, doc.page_count)
+        texts = [doc[i].get_text() for i in indices]
+    if not indices:
+        return []
+    template = templates.get_template(template) if template else templates.identify(texts[0])
+    runs = []
+    for i, text in zip(indices, texts):
+        if len(text.strip()) < MIN_TEXT_CHARS:
+            # A scanned page's headers are unknown until it is OCR'd
+            ocr, tables = True, True
+        else:
+            marks = squash(text).upper()
+            ocr, tables = False, template.summary_mark in marks or template.activity_mark in marks
+        if runs and runs[-1][1] == i and runs[-1][2:] == (ocr, tables):
+            runs[-1] = (runs[-1][0], i + 1, ocr, tables)
+        else:
+            runs.append((i + 1, i + 1, ocr, tables))
+    return runs
+
+def convert_fast(pdf_path, fields=None, template=None):
+    # Returns the text lines and docling table items of the pages `fields` need, in page order
+    lines, tables = [], []
+    with span('plan'):
+        runs = plan_fast(pdf_path, fields, template)
+    for first, last, ocr, table_structure in runs:
+        with span('convert'):
+            document = fast_converter(ocr, table_structure).convert(to_source(pdf_path), page_range=(first, last)).document
+        count('pages', last - first + 1)
+        count('ocr_pages', (last - first + 1) if ocr else 0)
+        count('table_pages', (last - first + 1) if table_structure else 0)
+        lines.extend(document_lines(document))
+        tables.extend(getattr(document, 'tables', []))
+    return lines, tables
+
+def extract_pdf_data(pdf_path, converter=None, cache=None, fields=None, template=None, pipeline='default'):
+    # pipeline='fast' replaces the single default conversion with convert_fast; `converter` only
+    # applies to the default pipeline
+    fields = field_pages.check_fields(fields, FIELDS)
+    if pipeline not in PIPELINES:
+        raise ValueError(f"Unknown pipeline {pipeline!r}, expected one of {PIPELINES}")
+    # Header fields only need page 1, so docling's layout and table models never see the rest
+    convert_kwargs = {'page_range': (1, 1)} if field_pages.header_only(fields) else {}
+    def extract(path):
+        if pipeline == 'fast':
+            lines, docling_tables = convert_fast(path, fields, template)
+            with span('parse'):
+                lines, result_json = parse_parts(lines, docling_tables, template)
+            return [lines], field_pages.select(result_json, fields)
+        conv = converter if converter is not None else DocumentConverter()
+        with span('convert'):
+            document = conv.convert(to_source(path), **convert_kwargs).document
+        count('pages', len(getattr(document, 'pages', ())))
+        # docling text items are not split per page, so the cached lines are a single page
+        with span('parse'):
+            lines, result_json = parse_document(document, template)
+        return [lines], field_pages.select(result_json, fields)
+    version = templates.cache_version(field_pages.cache_version(EXTRACTOR_VERSION, fields), template)
+    if pipeline != 'default':
+        version = f"{version}-{pipeline}"
+    return cached_extract(cache, pdf_path, EXTRACTOR_NAME, version, extract)
+
+def main(pdf_path=PDF_PATH, fields=None, args=None, pipeline='default'):
+    start = time.time()
+    with instrument.recording_from_args(args, extractor=EXTRACTOR_NAME):
+        result_json = extract_pdf_data(pdf_path, cache=ResultCache.from_env(), fields=fields, pipeline=pipeline)
     print(json.dumps(result_json, indent=2, ensure_ascii=False))
     elapsed = time.time() - start
     print(f"\n[docling_v2] Extraction completed in {elapsed:.2f} seconds.")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Extract TD Bank statement data with docling.')
+    parser.add_argument('pdf_path', nargs='?', default=PDF_PATH)
+    parser.add_argument('--pipeline', choices=PIPELINES, default='default',
+                        help='fast: OCR only pages without a text layer and run table structure only on '
+                             'the ACCOUNT SUMMARY / DAILY ACCOUNT ACTIVITY pages')
+    field_pages.add_arguments(parser, FIELDS)
+    instrument.add_arguments(parser)
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    args = parse_args()
+    main(args.pdf_path, fields=args.fields, args=args, pipeline=args.pipeline)
@@ -0,0 +1,199 @@
+import os
+import io
+import sys
+import json
+import time
+import queue
+import socket
+import argparse
+import threading
+import socketserver
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from docling.datamodel.base_models import ConversionStatus, DocumentStream, InputFormat
+from docling.document_converter import DocumentConverter
+from docling_v2.extract_pdf_text import parse_document
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH = 8
+DEFAULT_BATCH_WINDOW = 0.05  # seconds to wait for more requests before converting a batch
+OK_STATUSES = (ConversionStatus.SUCCESS, ConversionStatus.PARTIAL_SUCCESS)
+
+
+class ConversionBatcher:
+    # Owns the single warm DocumentConverter. Requests are queued and a background thread
+    # drains them in batches through convert_all, so concurrent callers share one pipeline.
+
+    def __init__(self, converter, max_batch=DEFAULT_MAX_BATCH, batch_window=DEFAULT_BATCH_WINDOW):
+        self.converter = converter
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.batches = 0
+        self.documents = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='docling-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, source):
+        future = Future()
+        self._queue.put((source, future))
+        return future
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            sources = [source for source, _ in batch]
+            try:
+                results = self.converter.convert_all(sources, raises_on_error=False)
+                for (_, future), conv in zip(batch, results):
+                    if conv.status in OK_STATUSES:
+                        future.set_result(parse_document(conv.document)[1])
+                    else:
+                        errors = '; '.join(str(getattr(e, 'error_message', e)) for e in conv.errors)
+                        future.set_exception(RuntimeError(f"docling conversion {conv.status}: {errors}"))
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError('docling returned no result for this document'))
+            self.batches += 1
+            self.documents += len(batch)
+
+
+class ExtractionHandler(BaseHTTPRequestHandler):
+    # POST /extract with either a JSON body {"path": "..."} or the raw PDF bytes
+    # (Content-Type: application/pdf). GET /health reports startup time and counters.
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != '/health':
+            self._send_json(404, {'error': 'not found'})
+            return
+        batcher = self.server.batcher
+        self._send_json(200, {
+            'status': 'ok',
+            'startup_seconds': round(self.server.startup_seconds, 3),
+            'uptime_seconds': round(time.time() - self.server.started_at, 3),
+            'batches': batcher.batches,
+            'documents': batcher.documents,
+        })
+
+    def do_POST(self):
+        if self.path != '/extract':
+            self._send_json(404, {'error': 'not found'})
+            return
+        start = time.time()
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip()
+        if content_type == 'application/json':
+            try:
+                source = json.loads(body)['path']
+            except (ValueError, KeyError, TypeError):
+                self._send_json(400, {'error': 'expected a JSON body like {"path": "/abs/path.pdf"}'})
+                return
+            if not os.path.isfile(source):
+                self._send_json(404, {'error': f'no such file: {source}'})
+                return
+        else:
+            name = self.headers.get('X-Filename', 'upload.pdf')
+            source = DocumentStream(name=name, stream=io.BytesIO(body))
+        try:
+            result = self.server.batcher.submit(source).result(timeout=self.server.request_timeout)
+        except Exception as e:
+            self._send_json(500, {'error': f"{type(e).__name__}: {e}"},
+                            {'X-Latency-Seconds': f"{time.time() - start:.3f}"})
+            return
+        latency = time.time() - start
+        self._send_json(200, result, {'X-Latency-Seconds': f"{latency:.3f}"})
+        self.log_message('extracted %s in %.3f s', getattr(source, 'name', source), latency)
+
+    def address_string(self):
+        # Unix socket clients have no (host, port) address
+        return self.client_address[0] if self.client_address else 'unix'
+
+
+class UnixHTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        socketserver.TCPServer.server_bind(self)
+        self.server_name, self.server_port = 'localhost', 0
+
+
+def build_server(host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None, max_batch=DEFAULT_MAX_BATCH,
+                 batch_window=DEFAULT_BATCH_WINDOW, request_timeout=None):
+    # Model loading happens here, once, instead of on every extraction
+    start = time.time()
+    converter = DocumentConverter()
+    converter.initialize_pipeline(InputFormat.PDF)
+    startup_seconds = time.time() - start
+    if unix_socket:
+        server = UnixHTTPServer(unix_socket, ExtractionHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ExtractionHandler)
+    server.batcher = ConversionBatcher(converter, max_batch=max_batch, batch_window=batch_window)
+    server.startup_seconds = startup_seconds
+    server.started_at = time.time()
+    server.request_timeout = request_timeout
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Serve docling extraction from a warm DocumentConverter.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix-socket', metavar='PATH', help='listen on a Unix socket instead of TCP')
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH,
+                        help='maximum number of documents passed to one convert_all call')
+    parser.add_argument('--batch-window', type=float, default=DEFAULT_BATCH_WINDOW,
+                        help='seconds to wait for more requests before starting a batch')
+    parser.add_argument('--request-timeout', type=float, default=None,
+                        help='seconds a request may wait for its conversion before failing')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = build_server(args.host, args.port, args.unix_socket, args.max_batch,
+                          args.batch_window, args.request_timeout)
+    where = args.unix_socket or f"http://{args.host}:{args.port}"
+    print(f"[docling_v2] Converter ready in {server.startup_seconds:.2f} seconds, listening on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
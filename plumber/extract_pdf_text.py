@@ -2,87 +2,439 @@ import pdfplumber
 import re
 import json
 import os
+import sys
 import time
+import argparse
+import traceback
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+from statement_extractor.cache import ResultCache, cached_extract
+from statement_extractor import instrument
+from statement_extractor.instrument import span, count
+from statement_extractor.source import normalize, open_stream, iter_pdf_paths
+from statement_extractor.pool import imap_unordered
+from statement_extractor import fields as field_pages
+from statement_extractor import templates
+from statement_extractor.templates import TD_BANK, squash
+from statement_extractor.models import amount_to_cents
 
 # Constants
-KEYWORDS = ["StatementPeriod", "CustRef#", "PrimaryAccount#"]
 PDF_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
 PDF_FILENAME = 'tdbank.pdf'
+EXTRACTOR_NAME = 'plumber'
+EXTRACTOR_VERSION = '1'
+FIELDS = ('customer_name', 'customer_address', 'statement_period', 'account_summary', 'daily_balance_summary')
+EXTRACT_MODES = ('text', 'words', 'chars')
+# pdfplumber's extract_text defaults, reused by the words/chars modes
+X_TOLERANCE = 3
+Y_TOLERANCE = 3
+
+
+# Patterns are compiled once and every line is normalized once; section markers are matched
+# against the line with spaces removed. Labels and markers come from the bank template
+# (statement_extractor.templates); the names below are the TD Bank ones.
+SUMMARY_SPLIT_RE = re.compile(r'(?<=[0-9]) (?=[A-Za-z])| (?=[A-Z][a-z])')
+SUMMARY_PAIR_RE = re.compile(r'([A-Za-z]+[A-Za-z ]*[A-Za-z]+) ([0-9,.%-]+)')
+BALANCE_PAIR_RE = re.compile(r'(\d{2}/\d{2})\s+([0-9,.-]+)')
+KEYWORDS = TD_BANK.squashed_labels
+PERIOD_RE = TD_BANK.squashed_period_re
+SUMMARY_MARK, ACTIVITY_MARK, BALANCE_MARK = TD_BANK.summary_mark, TD_BANK.activity_mark, TD_BANK.balance_mark
+
+
+class StatementParser:
+    # Single-pass parser: each line is normalized once and routed to the handlers of the
+    # sections that are still open. `done` flips once every section has closed so the caller
+    # can stop reading pages.
+
+    def __init__(self, template=TD_BANK):
+        self.template = template
+        self.name, self.address = None, []
+        self.period = None
+        self.summary = {}
+        self.daily = []
+        self._customer_state = 'find'  # find -> address -> done
+        self._in_summary = self._summary_done = False
+        self._in_daily = self._daily_done = False
+        self._period_prefix = squash(template.period_label) + ': '
+        self.done = False
+
+    def feed(self, line):
+        squashed = line.replace(' ', '')
+        t = self.template
+
+        if self._customer_state == 'find':
+            if t.name_anchor in line:
+                self.name = line.split(t.name_anchor)[0].strip()
+                self._customer_state = 'address'
+        elif self._customer_state == 'address':
+            self._address_line(line.strip())
+
+        if self.period is None and self._period_prefix in line:
+            m = t.squashed_period_re.search(line)
+            if m: self.period = m.group(1).strip()
+
+        if not self._summary_done:
+            if t.summary_mark in squashed:
+                self._in_summary = True
+            elif self._in_summary:
+                if t.activity_mark in squashed:
+                    self._summary_done = True
+                else:
+                    self._summary_line(line)
+
+        if not self._daily_done:
+            if t.balance_mark in squashed.upper():
+                self._in_daily = True
+            elif self._in_daily:
+                self._daily_line(line)
+
+        self.done = (self._daily_done and self._summary_done and self.period is not None
+                     and self._customer_state == 'done')
+
+    def _address_line(self, l):
+        if l:
+            for kw in self.template.squashed_labels:
+                if kw in l:
+                    l = l.split(kw)[0].strip()
+                    break
+        if not l:
+            self._customer_state = 'done'
+            return
+        self.address.append(l)
+
+    def _summary_line(self, line):
+        for part in SUMMARY_SPLIT_RE.split(line):
+            m = SUMMARY_PAIR_RE.match(part.strip())
+            if m: self.summary[m.group(1).replace(' ', '')] = m.group(2)
+
+    def _daily_line(self, line):
+        stripped = line.strip()
+        if not stripped or stripped.startswith(self.template.footer_prefix):
+            self._daily_done = True
+            return
+        # Skip header line
+        if 'DATE' in line and 'BALANCE' in line:
+            return
+        # Parse two columns per line
+        for date, balance in BALANCE_PAIR_RE.findall(line):
+            self.daily.append({'date': date, 'balance': balance})
+
+    def result(self):
+        return {
+            'customer_name': self.name,
+            'customer_address': self.address,
+            'statement_period': self.period,
+            'account_summary': self.summary,
+            'daily_balance_summary': self.daily
+        }
+
+
+def parse_lines(lines, template=TD_BANK):
+    parser = StatementParser(template)
+    for line in lines:
+        parser.feed(line)
+        if parser.done:
+            break
+    return parser.result()
+
+
+TRANSACTION_RE = re.compile(r'^(\d{2}/\d{2}) (.+) (-?[0-9,]+\.\d{2})$')
+# DAILY ACCOUNT ACTIVITY sub-sections, keyed by their text with spaces removed
+ACTIVITY_SECTIONS = TD_BANK.activity_section_names
+
+
+class TransactionParser:
+    # Walks the DAILY ACCOUNT ACTIVITY section and emits one row per posting:
+    # (section, date, description, details, amount_cents). Lines under a posting that carry
+    # no date (merchant, card number) are collected into `details`. Page footers and the
+    # repeated page header are skipped until the next DAILYACCOUNTACTIVITY marker.
+
+    def __init__(self, template=TD_BANK):
+        self.template = template
+        self.rows = []
+        self.state = 'before'  # before -> between <-> rows, page_break, done
+        self.section = None
+        self._details = None
+        self.done = False
+
+    def _flush(self):
+        if self._details is not None:
+            row = self.rows[-1]
+            self.rows[-1] = row[:3] + (' '.join(self._details),) + row[4:]
+            self._details = None
+
+    def feed(self, line):
+        squashed = line.replace(' ', '')
+        stripped = line.strip()
+        t = self.template
+        if t.balance_mark in squashed.upper():
+            self._flush()
+            self.state, self.done = 'done', True
+            return
+        if t.activity_mark in squashed:
+            self._flush()
+            self.state = 'between'
+            return
+        if self.state in ('before', 'page_break', 'done') or not stripped:
+            return
+        if stripped.startswith(t.footer_prefix):
+            self._flush()
+            self.state = 'page_break'
+            return
+        if self.state == 'between':
+            if t.posting_date_mark in squashed:
+                self.state = 'rows'
+            else:
+                title = squashed.split('(')[0]
+                self.section = t.activity_section_names.get(title.upper(), title)
+            return
+        if squashed.startswith('Subtotal:'):
+            self._flush()
+            self.state = 'between'
+            return
+        m = TRANSACTION_RE.match(stripped)
+        if m:
+            self._flush()
+            self.rows.append((self.section, m.group(1), m.group(2).strip(), '', amount_to_cents(m.group(3))))
+            self._details = []
+        elif self._details is not None:
+            self._details.append(stripped)
+
+
+def parse_transactions(pages, template=None):
+    parser = None
+    for page_lines in pages:
+        if parser is None:
+            parser = TransactionParser(templates.get_template(template) if template else templates.identify(page_lines))
+        for line in page_lines:
+            parser.feed(line)
+            if parser.done:
+                return parser.rows
+    if parser is None:
+        return []
+    parser._flush()
+    return parser.rows
 
 
 def extract_customer_info(lines):
-    for i, line in enumerate(lines):
-        if 'Page:' in line:
-            name = line.split('Page:')[0].strip()
-            address = []
-            for l in lines[i+1:]:
-                l = l.strip()
-                if not l: break
-                for kw in KEYWORDS:
-                    if kw in l:
-                        l = l.split(kw)[0].strip()
-                        break
-                if not l: break
-                address.append(l)
-            return name, address
-    return None, []
+    result = parse_lines(lines)
+    return result['customer_name'], result['customer_address']
 
 
 def extract_statement_period(lines):
-    for line in lines:
-        m = re.search(r'StatementPeriod: ([^\n]+)', line)
-        if m: return m.group(1).strip()
-    return None
+    return parse_lines(lines)['statement_period']
 
 
 def extract_account_summary(lines):
-    summary, in_summary = {}, False
-    for line in lines:
-        if 'ACCOUNTSUMMARY' in line.replace(' ', ''): in_summary = True; continue
-        if in_summary:
-            if 'DAILYACCOUNTACTIVITY' in line.replace(' ', ''): break
-            for part in re.split(r'(?<=[0-9]) (?=[A-Za-z])| (?=[A-Z][a-z])', line):
-                m = re.match(r'([A-Za-z]+[A-Za-z ]*[A-Za-z]+) ([0-9,.%-]+)', part.strip())
-                if m: summary[m.group(1).replace(' ', '')] = m.group(2)
-    return summary
+    return parse_lines(lines)['account_summary']
 
 
 def extract_daily_balance_summary(lines):
-    summary = []
-    in_section = False
-    for line in lines:
-        if 'DAILYBALANCESUMMARY' in line.replace(' ', '').upper():
-            in_section = True
-            continue
-        if in_section:
-            if not line.strip() or line.strip().startswith('Call '):
-                break
-            # Skip header line
-            if 'DATE' in line and 'BALANCE' in line:
+    return parse_lines(lines)['daily_balance_summary']
+
+
+class MemoryLimitExceeded(MemoryError):
+    def __init__(self, rss, limit, page_no):
+        super().__init__(f"RSS {rss / 2**20:.0f} MB exceeds the {limit / 2**20:.0f} MB limit after page {page_no}")
+        self.rss = rss
+        self.limit = limit
+        self.page_no = page_no
+
+
+def cluster_lines(objects, y_tolerance=Y_TOLERANCE):
+    # Groups words or chars into rows by `top` and returns each row sorted left to right
+    rows = []
+    for obj in sorted(objects, key=lambda o: o['top']):
+        if rows and obj['top'] - rows[-1][0] <= y_tolerance:
+            rows[-1][1].append(obj)
+        else:
+            rows.append((obj['top'], [obj]))
+    return [sorted(row, key=lambda o: o['x0']) for _, row in rows]
+
+
+def page_lines(page, mode='text'):
+    # text: pdfplumber's full text layout. words: extract_words joined by row, skipping the text
+    # map. chars: raw chars joined by row, a space wherever the gap exceeds X_TOLERANCE, which
+    # reproduces extract_text's spacing (narrow label gaps are dropped) at the lowest cost.
+    if mode == 'text':
+        return (page.extract_text() or '').splitlines()
+    if mode == 'words':
+        return [' '.join(w['text'] for w in row) for row in cluster_lines(page.extract_words())]
+    lines = []
+    for row in cluster_lines(page.chars):
+        parts, prev, gap = [], None, False
+        for c in row:
+            if c['text'].isspace():
+                gap = True
                 continue
-            # Parse two columns per line
-            m = re.findall(r'(\d{2}/\d{2})\s+([0-9,.-]+)', line)
-            for date, balance in m:
-                summary.append({'date': date, 'balance': balance})
-    return summary
-
-
-def extract_pdf_data(pdf_path):
-    with pdfplumber.open(pdf_path) as pdf:
-        lines = [l for page in pdf.pages for l in (page.extract_text() or '').splitlines()]
-    name, address = extract_customer_info(lines)
-    return {
-        'customer_name': name,
-        'customer_address': address,
-        'statement_period': extract_statement_period(lines),
-        'account_summary': extract_account_summary(lines),
-        'daily_balance_summary': extract_daily_balance_summary(lines)
-    }
+            if prev is not None and (gap or c['x0'] - prev['x1'] > X_TOLERANCE):
+                parts.append(' ')
+            parts.append(c['text'])
+            prev, gap = c, False
+        if parts:
+            lines.append(''.join(parts))
+    return lines
 
 
-if __name__ == "__main__":
+def iter_page_lines(pdf_path, fields=None, mode='text', low_memory=False, max_rss_mb=None):
+    # pdf_path is a path or a bytes-like buffer; large local files are read through an mmap.
+    # With `fields`, pages that cannot hold any of them are never laid out. low_memory releases
+    # each page's chars, layout objects and text map as soon as its lines are taken, so memory
+    # stays flat however many pages the statement has; max_rss_mb aborts once RSS passes it.
+    if mode not in EXTRACT_MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {EXTRACT_MODES}")
+    limit = max_rss_mb * 2**20 if max_rss_mb else None
+    with open_stream(pdf_path) as stream:
+        with span('open'):
+            pdf = pdfplumber.open(stream)
+        with pdf:
+            for page_no in field_pages.page_indices(fields, len(pdf.pages)):
+                page = pdf.pages[page_no]
+                with span('extract_text'):
+                    lines = page_lines(page, mode)
+                if low_memory:
+                    page.close()
+                    # pdfminer keeps every parsed object (decoded content streams included) for the
+                    # life of the document; it is only a cache, objects are re-read on demand
+                    cached_objs = getattr(pdf.doc, '_cached_objs', None)
+                    if cached_objs is not None:
+                        cached_objs.clear()
+                count('pages')
+                count('lines', len(lines))
+                if limit is not None:
+                    rss = instrument.rss_bytes()
+                    if rss > limit:
+                        raise MemoryLimitExceeded(rss, limit, page_no + 1)
+                yield lines
+
+
+def read_pages(pdf_path, fields=None):
+    return list(iter_page_lines(pdf_path, fields))
+
+
+def parse_pages(pages, template=None):
+    # `pages` may be a generator; only the current page's lines are held while parsing.
+    # Without an explicit template, it is identified from the first page read.
+    parser = None
+    for page_lines in pages:
+        if parser is None:
+            with span('identify'):
+                parser = StatementParser(templates.get_template(template) if template else templates.identify(page_lines))
+        with span('parse'):
+            for line in page_lines:
+                parser.feed(line)
+                if parser.done:
+                    return parser.result()
+    return (parser or StatementParser(templates.get_template(template))).result()
+
+
+def _extract_uncached(pdf_path, fields=None, template=None, **page_options):
+    pages = list(iter_page_lines(pdf_path, fields, **page_options))
+    return pages, field_pages.select(parse_pages(pages, template), fields)
+
+
+def extract_pdf_data(pdf_path, cache=None, fields=None, template=None, mode='text', low_memory=False,
+                     max_rss_mb=None):
+    # `template` (a Template or registered name) overrides the bank layout identified from page 1.
+    # mode/low_memory/max_rss_mb are passed to iter_page_lines.
+    fields = field_pages.check_fields(fields, FIELDS)
+    page_options = {'mode': mode, 'low_memory': low_memory, 'max_rss_mb': max_rss_mb}
+    if cache is None:
+        pages = iter_page_lines(normalize(pdf_path), fields, **page_options)
+        return field_pages.select(parse_pages(pages, template), fields)
+    # The cache stores the raw page lines too, so this path keeps every page
+    version = templates.cache_version(field_pages.cache_version(EXTRACTOR_VERSION, fields), template)
+    if mode != 'text':
+        version = f"{version}-{mode}"
+    return cached_extract(cache, pdf_path, EXTRACTOR_NAME, version,
+                          lambda path: _extract_uncached(path, fields, template, **page_options))
+
+
+def _extract_chunk(pdf_paths, cache=None, fields=None, page_options=None):
+    records = []
+    for pdf_path in pdf_paths:
+        start = time.time()
+        with instrument.recording(extractor=EXTRACTOR_NAME) as rec:
+            try:
+                data = extract_pdf_data(pdf_path, cache=cache, fields=fields, **(page_options or {}))
+                record = {'file': pdf_path, 'ok': True, 'data': data}
+            except Exception as e:
+                record = {'file': pdf_path, 'ok': False, 'error': f"{type(e).__name__}: {e}",
+                          'traceback': traceback.format_exc()}
+        record['seconds'] = round(time.time() - start, 4)
+        record['timing'] = rec.report()
+        records.append(record)
+    return records
+
+
+def extract_batch(pdf_paths, workers=None, chunksize=1, cache=None, fields=None, page_options=None):
+    # Yields one record per statement in completion order; failures come back as records. Chunks
+    # are handed out two per worker at a time, and a worker that dies (e.g. killed by the OOM
+    # killer) only fails its own chunk: see pool.imap_unordered.
+    pdf_paths = list(pdf_paths)
+    chunks = ((pdf_paths[i:i + chunksize], cache, fields, page_options) for i in range(0, len(pdf_paths), chunksize))
+    for (chunk, *_), records, error in imap_unordered(_extract_chunk, chunks, workers):
+        if error is not None:
+            records = [{'file': p, 'ok': False, 'error': f"{type(error).__name__}: {error}"} for p in chunk]
+        yield from records
+
+
+def run_batch(source, output, workers=None, chunksize=1, cache=None, fields=None, page_options=None):
+    pdf_paths = iter_pdf_paths(source)
+    ok = failed = 0
     start = time.time()
-    pdf_path = os.path.join(PDF_DIR, PDF_FILENAME)
-    print(json.dumps(extract_pdf_data(pdf_path), indent=2, ensure_ascii=False))
+    with open(output, 'a', encoding='utf-8') as out:
+        for record in extract_batch(pdf_paths, workers=workers, chunksize=chunksize, cache=cache, fields=fields,
+                                    page_options=page_options):
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            out.flush()
+            if record['ok']:
+                ok += 1
+            else:
+                failed += 1
     elapsed = time.time() - start
-    print(f"\n[plumber] Extraction completed in {elapsed:.2f} seconds.") 
\ No newline at end of file
+    print(f"[plumber] Batch of {len(pdf_paths)} files done in {elapsed:.2f} seconds ({ok} ok, {failed} failed).")
+    return ok, failed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Extract TD Bank statement data with pdfplumber.')
+    parser.add_argument('--batch', metavar='DIR_OR_GLOB',
+                        help='extract every PDF in a directory (recursive) or matching a glob pattern')
+    parser.add_argument('--output', default='plumber_results.jsonl',
+                        help='JSON Lines file the batch results are appended to')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes (default: CPU count)')
+    parser.add_argument('--chunksize', type=int, default=1,
+                        help='number of files handed to a worker at a time')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='always re-extract instead of reusing results cached by content hash')
+    parser.add_argument('--mode', choices=EXTRACT_MODES, default='text',
+                        help='text: full layout (default); words/chars: cheaper line building from '
+                             'extract_words or raw chars')
+    parser.add_argument('--low-memory', action='store_true',
+                        help="release each page's layout objects and text map as soon as its lines are read")
+    parser.add_argument('--max-rss-mb', type=float, default=None,
+                        help='abort a statement with MemoryLimitExceeded once the process RSS passes this')
+    field_pages.add_arguments(parser, FIELDS)
+    instrument.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    cache = None if args.no_cache else ResultCache.from_env()
+    page_options = {'mode': args.mode, 'low_memory': args.low_memory, 'max_rss_mb': args.max_rss_mb}
+    if args.batch:
+        run_batch(args.batch, args.output, workers=args.workers, chunksize=max(1, args.chunksize), cache=cache,
+                  fields=args.fields, page_options=page_options)
+    else:
+        start = time.time()
+        pdf_path = os.path.join(PDF_DIR, PDF_FILENAME)
+        with instrument.recording_from_args(args, extractor=EXTRACTOR_NAME):
+            result = extract_pdf_data(pdf_path, cache=cache, fields=args.fields, **page_options)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        elapsed = time.time() - start
+        print(f"\n[plumber] Extraction completed in {elapsed:.2f} seconds.")
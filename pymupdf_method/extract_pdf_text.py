@@ -1,127 +1,264 @@
 import fitz  # PyMuPDF
 import re
 import os
+import sys
 import json
 import time
+import argparse
+from itertools import chain
+from collections import deque
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+from statement_extractor.cache import ResultCache, cached_extract
+from statement_extractor import instrument
+from statement_extractor.instrument import span, count
+from statement_extractor.source import is_path, normalize
+from statement_extractor import fields as field_pages
+from statement_extractor import templates
+from statement_extractor.templates import TD_BANK
 
 PDF_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'tdbank.pdf')
+EXTRACTOR_NAME = 'pymupdf'
+EXTRACTOR_VERSION = '1'
 
-SUMMARY_KEYS = [
-    'Beginning Balance', 'Average Collected Balance', 'Electronic Deposits',
-    'Interest Earned This Period', 'Interest Paid Year-to-Date', 'Electronic Payments',
-    'Annual Percentage Yield Earned', 'Service Charges', 'Days in Period', 'Ending Balance'
-]
+# TD Bank names; the parsers read these from the template picked for each statement
+SUMMARY_KEYS = TD_BANK.summary_keys
+SUMMARY_HEADER = TD_BANK.summary_header
+ACTIVITY_HEADER = TD_BANK.activity_header
+FIELDS = ('customer_name', 'customer_address', 'statement_period', 'account_summary', 'daily_balance_summary')
 
-SUMMARY_HEADER = 'ACCOUNT SUMMARY'
-ACTIVITY_HEADER = 'DAILY ACCOUNT ACTIVITY'
 
+# Section parsers are state machines fed one line at a time. `done` flips once a section has
+# closed so the page loop can stop feeding it; the daily balance summary only ever needs the tail.
 
-def extract_customer_info(lines):
+class CustomerInfoParser:
     # Search for a block of 3-4 consecutive lines: name (all uppercase), street, city/zip, country
-    for i in range(len(lines)-3):
-        l0 = lines[i].strip()
-        l1 = lines[i+1].strip()
-        l2 = lines[i+2].strip()
-        l3 = lines[i+3].strip() if i+3 < len(lines) else ''
+    def __init__(self, template=TD_BANK):
+        self.countries = template.countries
+        self.window = deque(maxlen=4)
+        self.name, self.address = '', []
+        self.done = False
+
+    def feed(self, line):
+        self.window.append(line.strip())
+        if len(self.window) < 4:
+            return
+        l0, l1, l2, l3 = self.window
         # Heuristic: name is all uppercase, next lines are plausible address
         if l0.isupper() and len(l0.split()) >= 2 and l1 and l2 and (l3.isupper() or l3.istitle() or l3.isdigit() or l3):
             # Check for country in l3 or l2
-            if any(x in l3.upper() for x in ['KAZAKHSTAN', 'USA', 'INDIA']) or any(x in l2.upper() for x in ['KAZAKHSTAN', 'USA', 'INDIA']):
-                return l0, [l1, l2, l3] if l3 else [l1, l2]
-    # Fallback to previous logic
-    return '', []
+            if any(x in l3.upper() for x in self.countries) or any(x in l2.upper() for x in self.countries):
+                self.name, self.address = l0, [l1, l2, l3] if l3 else [l1, l2]
+                self.done = True
 
-def extract_statement_period(lines):
+    def result(self):
+        return self.name, self.address
+
+class StatementPeriodParser:
     date_pattern = re.compile(r'([A-Za-z]{3,9} \d{1,2} \d{4}-[A-Za-z]{3,9} \d{1,2} \d{4})')
-    for i, line in enumerate(lines):
-        if 'Statement Period:' in line:
-            for j in range(i+1, len(lines)):
-                val = lines[j].strip()
-                if not val or val in ('Cust Ref #:', 'Primary Account #:'):
-                    continue
-                m = date_pattern.search(val)
-                if m:
-                    return m.group(1)
-    return None
-
-def extract_account_summary(lines):
-    summary = {}
-    in_summary = False
-    for i, line in enumerate(lines):
-        if SUMMARY_HEADER in line:
-            in_summary = True
-            continue
-        if in_summary:
-            if ACTIVITY_HEADER in line:
-                break
-            for key in SUMMARY_KEYS:
+
+    def __init__(self, template=TD_BANK):
+        self.label = template.period_label + ':'
+        self.label_values = template.label_values
+        self.armed = False
+        self.period = None
+        self.done = False
+
+    def feed(self, line):
+        if not self.armed:
+            self.armed = self.label in line
+            return
+        val = line.strip()
+        if not val or val in self.label_values:
+            return
+        m = self.date_pattern.search(val)
+        if m:
+            self.period = m.group(1)
+            self.done = True
+
+    def result(self):
+        return self.period
+
+class AccountSummaryParser:
+    def __init__(self, template=TD_BANK):
+        self.template = template
+        self.summary = {}
+        self.in_summary = False
+        self.closed = False
+        # Keys seen on a label line, waiting for the next numeric line as their value
+        self.pending = []
+        self.done = False
+
+    def feed(self, line):
+        val = line.strip()
+        if self.pending and val and re.match(r'^[0-9,.%-]+$', val):
+            for key in self.pending:
+                self.summary[key.replace(' ', '')] = val
+            self.pending = []
+        if self.closed:
+            self.done = not self.pending
+            return
+        t = self.template
+        if t.summary_header in line:
+            self.in_summary = True
+            return
+        if self.in_summary:
+            if t.activity_header in line:
+                self.closed = True
+                self.done = not self.pending
+                return
+            for key in t.summary_keys:
                 if key in line:
-                    # Take the next non-empty line as value
-                    for j in range(i+1, len(lines)):
-                        val = lines[j].strip()
-                        if val and re.match(r'^[0-9,.%-]+$', val):
-                            summary[key.replace(' ', '')] = val
-                            break
-    return summary
-
-def extract_daily_balance_summary(lines, last_lines=None):
-    summary = []
-    in_section = False
-    search_lines = last_lines if last_lines is not None else lines
-    found_header = False
-    date_list = []
-    balance_list = []
-    for line in search_lines:
-        if 'DAILYBALANCESUMMARY' in line.replace(' ', '').upper():
-            in_section = True
-            found_header = True
-            continue
-        if in_section:
-            if not line.strip() or line.strip().startswith('Call '):
-                break
+                    self.pending.append(key)
+
+    def result(self):
+        return self.summary
+
+class DailyBalanceParser:
+    def __init__(self, template=TD_BANK):
+        self.mark = template.balance_mark
+        self.footer_prefix = template.footer_prefix
+        self.in_section = False
+        self.date_list = []
+        self.balance_list = []
+        self.done = False
+
+    def feed(self, line):
+        if self.mark in line.replace(' ', '').upper():
+            self.in_section = True
+            return
+        if self.in_section:
+            if not line.strip() or line.strip().startswith(self.footer_prefix):
+                self.done = True
+                return
             # Skip header lines
             if 'DATE' in line.upper() or 'BALANCE' in line.upper():
-                continue
+                return
             # Collect dates and balances
             date_match = re.match(r'\d{2}/\d{2}', line.strip())
             balance_match = re.match(r'^[0-9,.-]+$', line.strip())
             if date_match:
-                date_list.append(line.strip())
+                self.date_list.append(line.strip())
             elif balance_match:
-                balance_list.append(line.strip())
-    # Pair dates and balances in order
-    for date, balance in zip(date_list, balance_list):
-        summary.append({'date': date, 'balance': balance})
-    return summary
+                self.balance_list.append(line.strip())
 
-def main():
-    start = time.time()
-    doc = fitz.open(PDF_PATH)
-    lines = []
-    all_pages = []
-    for page in doc:
-        text = page.get_text()
-        page_lines = text.splitlines()
-        lines.extend(page_lines)
-        all_pages.append(page_lines)
+    def result(self):
+        # Pair dates and balances in order
+        return [{'date': date, 'balance': balance} for date, balance in zip(self.date_list, self.balance_list)]
+
+def _run(parser, lines):
+    for line in lines:
+        parser.feed(line)
+        if parser.done:
+            break
+    return parser.result()
+
+def extract_customer_info(lines, template=TD_BANK):
+    return _run(CustomerInfoParser(template), lines)
+
+def extract_statement_period(lines, template=TD_BANK):
+    return _run(StatementPeriodParser(template), lines)
+
+def extract_account_summary(lines, template=TD_BANK):
+    return _run(AccountSummaryParser(template), lines)
+
+def extract_daily_balance_summary(lines, last_lines=None, template=TD_BANK):
+    return _run(DailyBalanceParser(template), last_lines if last_lines is not None else lines)
+
+def open_document(pdf_path):
+    # MuPDF reads local files itself; in-memory input is handed over as a stream without a temp file
+    if is_path(pdf_path):
+        return fitz.open(pdf_path)
+    return fitz.open(stream=pdf_path, filetype='pdf')
+
+def iter_page_lines(pdf_path, fields=None):
+    # With `fields`, pages that cannot hold any of them are never loaded
+    with span('open'):
+        doc = open_document(pdf_path)
+    with doc:
+        for page_no in field_pages.page_indices(fields, doc.page_count):
+            page = doc[page_no]
+            with span('get_text'):
+                lines = page.get_text().splitlines()
+            count('pages')
+            count('lines', len(lines))
+            yield lines
+
+def read_pages(pdf_path, fields=None):
+    return list(iter_page_lines(pdf_path, fields))
+
+def parse_pages(pages, template=None):
+    # `pages` may be a generator: header sections are parsed as pages stream past and only the
+    # last 2 pages are kept around for the daily balance summary. Unless given, the bank
+    # template is identified from the first page.
+    pages = iter(pages)
+    first = next(pages, [])
+    with span('identify'):
+        template = templates.get_template(template) if template else templates.identify(first)
+    customer, period, summary = CustomerInfoParser(template), StatementPeriodParser(template), AccountSummaryParser(template)
+    active = [customer, period, summary]
+    tail = deque(maxlen=2)
+    for page_lines in chain([first], pages):
+        tail.append(page_lines)
+        with span('parse'):
+            for line in page_lines if active else ():
+                for parser in active:
+                    parser.feed(line)
+                if any(parser.done for parser in active):
+                    active = [parser for parser in active if not parser.done]
+                    if not active:
+                        break
     # Use only the last 2 pages for daily balance summary
-    last_lines = []
-    for page_lines in all_pages[-2:]:
-        last_lines.extend(page_lines)
-    name, address = extract_customer_info(lines)
-    statement_period = extract_statement_period(lines)
-    account_summary = extract_account_summary(lines)
-    daily_balance_summary = extract_daily_balance_summary(lines, last_lines=last_lines)
+    last_lines = [line for page_lines in tail for line in page_lines]
+    name, address = customer.result()
+    with span('parse'):
+        daily_balance_summary = extract_daily_balance_summary(None, last_lines=last_lines, template=template)
     result = {
         'customer_name': name,
         'customer_address': address,
-        'statement_period': statement_period,
-        'account_summary': account_summary,
+        'statement_period': period.result(),
+        'account_summary': summary.result(),
         'daily_balance_summary': daily_balance_summary
     }
+    return result
+
+def _extract_uncached(pdf_path, fields=None, template=None):
+    pages = read_pages(pdf_path, fields)
+    return pages, field_pages.select(parse_pages(pages, template), fields)
+
+def extract_pdf_data(pdf_path, cache=None, fields=None, template=None):
+    # `template` (a Template or registered name) overrides the bank layout identified from page 1
+    fields = field_pages.check_fields(fields, FIELDS)
+    if cache is None:
+        return field_pages.select(parse_pages(iter_page_lines(normalize(pdf_path), fields), template), fields)
+    # The cache stores the raw page lines too, so this path keeps every page
+    version = templates.cache_version(field_pages.cache_version(EXTRACTOR_VERSION, fields), template)
+    return cached_extract(cache, pdf_path, EXTRACTOR_NAME, version,
+                          lambda path: _extract_uncached(path, fields, template))
+
+def main(pdf_path=PDF_PATH, layout=False, fields=None, args=None):
+    start = time.time()
+    with instrument.recording_from_args(args, extractor='pymupdf_layout' if layout else EXTRACTOR_NAME):
+        if layout:
+            from pymupdf_method.layout import extract_pdf_data as extract_layout
+            result = extract_layout(pdf_path, cache=ResultCache.from_env(), fields=fields)
+        else:
+            result = extract_pdf_data(pdf_path, cache=ResultCache.from_env(), fields=fields)
     print(json.dumps(result, indent=2, ensure_ascii=False))
     elapsed = time.time() - start
     print(f"\n[pymupdf] Extraction completed in {elapsed:.2f} seconds.")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Extract TD Bank statement data with PyMuPDF.')
+    parser.add_argument('pdf_path', nargs='?', default=PDF_PATH)
+    parser.add_argument('--layout', action='store_true',
+                        help='join labels to values by word coordinates, reading only the regions that hold fields')
+    field_pages.add_arguments(parser, FIELDS)
+    instrument.add_arguments(parser)
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    args = parse_args()
+    main(args.pdf_path, layout=args.layout, fields=args.fields, args=args) 
\ No newline at end of file
@@ -0,0 +1,202 @@
+import re
+import os
+import sys
+from statistics import median
+
+import fitz  # PyMuPDF
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+from statement_extractor.cache import cached_extract
+from statement_extractor.instrument import span, count
+from statement_extractor import fields as field_pages
+from statement_extractor import templates
+from statement_extractor.templates import TD_BANK
+from pymupdf_method.extract_pdf_text import (
+    FIELDS, CustomerInfoParser, StatementPeriodParser, open_document,
+)
+
+# Layout-aware variant of the PyMuPDF method: words are taken with their bounding boxes,
+# grouped into row bands, and a label is joined to the value printed on the same row.
+# Page 1 is only read down to FIRST_PAGE_CLIP (header + ACCOUNT SUMMARY), and only the
+# last 2 pages are read for the DAILY BALANCE SUMMARY.
+
+EXTRACTOR_NAME = 'pymupdf_layout'
+EXTRACTOR_VERSION = '1'
+
+# Fraction of page 1 (from the top) holding the header and ACCOUNT SUMMARY blocks
+FIRST_PAGE_CLIP = 0.5
+
+NUMBER_RE = re.compile(r'^[0-9,.%-]+$')
+DATE_RE = re.compile(r'^\d{2}/\d{2}$')
+DAILY_BALANCE_HEADER = TD_BANK.balance_header
+
+
+class RowIndex:
+    # Words (PyMuPDF "words" tuples) clustered into rows by vertical centre. Rows are sorted
+    # left to right and every word text maps to its (row, position) slots, so a label lookup
+    # is a dict hit plus a short walk along one row instead of a scan over every line.
+
+    def __init__(self, words, tolerance=None):
+        words = [w for w in words if w[4].strip()]
+        if tolerance is None:
+            tolerance = median(w[3] - w[1] for w in words) / 2 if words else 0
+        self.rows = []
+        centre = None
+        for w in sorted(words, key=lambda w: (w[1] + w[3]) / 2):
+            yc = (w[1] + w[3]) / 2
+            if centre is None or yc - centre > tolerance:
+                self.rows.append([])
+                centre = yc
+            self.rows[-1].append(w)
+        self.positions = {}
+        for r, row in enumerate(self.rows):
+            row.sort(key=lambda w: w[0])
+            for i, w in enumerate(row):
+                self.positions.setdefault(w[4], []).append((r, i))
+
+    def row_text(self, r):
+        return ' '.join(w[4] for w in self.rows[r])
+
+    def find(self, phrase):
+        # Yields (row, index just past the phrase) for every occurrence of the word sequence
+        tokens = phrase.split()
+        for r, i in self.positions.get(tokens[0], ()):
+            row = self.rows[r]
+            if [w[4] for w in row[i:i + len(tokens)]] == tokens:
+                yield r, i + len(tokens)
+
+    def first_row(self, phrase, start=0):
+        rows = [r for r, _ in self.find(phrase) if r >= start]
+        return min(rows) if rows else None
+
+    def value_after(self, phrase, pattern=NUMBER_RE, rows=None):
+        for r, j in self.find(phrase):
+            if rows is not None and r not in rows:
+                continue
+            for w in self.rows[r][j:]:
+                if pattern.match(w[4]):
+                    return w[4]
+        return None
+
+
+def text_lines(words):
+    # Rebuild PyMuPDF's block/line reading order from the words' block and line numbers
+    lines = {}
+    for w in sorted(words, key=lambda w: (w[5], w[6], w[7])):
+        lines.setdefault((w[5], w[6]), []).append(w[4])
+    return [' '.join(line) for line in lines.values()]
+
+
+def extract_first_page(page, clip_fraction=FIRST_PAGE_CLIP, template=None):
+    with span('get_words'):
+        words = page.get_text('words', clip=fitz.Rect(0, 0, page.rect.width, page.rect.height * clip_fraction))
+    count('pages')
+    if template is None:
+        with span('identify'):
+            template = templates.identify(' '.join(w[4] for w in words))
+    with span('parse'):
+        return _parse_first_page(page, words, clip_fraction, templates.get_template(template))
+
+
+def _parse_first_page(page, words, clip_fraction, template):
+    index = RowIndex(words)
+    summary_row = index.first_row(template.summary_header)
+    if summary_row is None and clip_fraction < 1:
+        # Unusually tall header: fall back to the whole page
+        return extract_first_page(page, 1, template)
+    header_end = summary_row if summary_row is not None else len(index.rows)
+    header_rows = range(header_end)
+
+    customer = CustomerInfoParser(template)
+    header_words = [w for r in header_rows for w in index.rows[r]]
+    for line in text_lines(header_words):
+        customer.feed(line)
+        if customer.done:
+            break
+    period = None
+    for r, j in index.find(template.period_label + ':'):
+        if r >= header_end:
+            continue
+        m = StatementPeriodParser.date_pattern.search(' '.join(w[4] for w in index.rows[r][j:]))
+        if m:
+            period = m.group(1)
+            break
+
+    summary = {}
+    summary_rows = range(0)
+    if summary_row is not None:
+        activity_row = index.first_row(template.activity_header, start=summary_row + 1)
+        summary_rows = range(summary_row + 1, activity_row if activity_row is not None else len(index.rows))
+        for key in template.summary_keys:
+            value = index.value_after(key, rows=summary_rows)
+            if value is not None:
+                summary[key.replace(' ', '')] = value
+    name, address = customer.result()
+    lines = [index.row_text(r) for r in header_rows] + [index.row_text(r) for r in summary_rows]
+    return lines, name, address, period, summary
+
+
+def extract_daily_balances(page, template=TD_BANK):
+    with span('get_words'):
+        words = page.get_text('words')
+    count('pages')
+    with span('parse'):
+        return _parse_daily_balances(words, template)
+
+
+def _parse_daily_balances(words, template):
+    index = RowIndex(words)
+    top = index.first_row(template.balance_header)
+    if top is None:
+        return [], None
+    footer = template.footer_prefix.strip()
+    lines, balances = [], []
+    for r in range(top + 1, len(index.rows)):
+        row = index.rows[r]
+        if row[0][4] == footer:
+            break
+        lines.append(index.row_text(r))
+        # Each date is paired with the next number to its right on the same row
+        pending = None
+        for w in row:
+            if DATE_RE.match(w[4]):
+                pending = w[4]
+            elif pending and NUMBER_RE.match(w[4]):
+                balances.append({'date': pending, 'balance': w[4]})
+                pending = None
+    return lines, balances
+
+
+def _extract_uncached(pdf_path, fields=None, template=None):
+    first_lines, name, address, period, summary = [], '', [], None, {}
+    daily_lines, daily = [], []
+    wanted = fields or FIELDS
+    with span('open'):
+        doc = open_document(pdf_path)
+    with doc:
+        if doc.page_count and any(field != 'daily_balance_summary' for field in wanted):
+            first_lines, name, address, period, summary = extract_first_page(doc[0], template=template)
+        if 'daily_balance_summary' in wanted:
+            daily_template = templates.get_template(template) if template else templates.identify(first_lines)
+            # Same as the text method: the daily balance summary lives on the last 2 pages
+            for page_no in range(max(0, doc.page_count - 2), doc.page_count):
+                daily_lines, found = extract_daily_balances(doc[page_no], daily_template)
+                if found is not None:
+                    daily = found
+                    break
+    pages = [first_lines, daily_lines]
+    return pages, field_pages.select({
+        'customer_name': name,
+        'customer_address': address,
+        'statement_period': period,
+        'account_summary': summary,
+        'daily_balance_summary': daily
+    }, fields)
+
+
+def extract_pdf_data(pdf_path, cache=None, fields=None, template=None):
+    fields = field_pages.check_fields(fields, FIELDS)
+    version = templates.cache_version(field_pages.cache_version(EXTRACTOR_VERSION, fields), template)
+    return cached_extract(cache, pdf_path, EXTRACTOR_NAME, version, lambda path: _extract_uncached(path, fields, template))
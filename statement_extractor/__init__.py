@@ -0,0 +1,11 @@
+from .api import METHODS, extract
+
+__all__ = ['METHODS', 'extract', 'extract_many']
+
+
+def __getattr__(name):
+    # asyncio is only imported by callers that use the async API
+    if name == 'extract_many':
+        from .aio import extract_many
+        return extract_many
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,183 @@
+import os
+import time
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+from .api import METHODS, OCR_METHODS, OCRRequired, extract
+from .source import is_path, normalize, source_name
+
+# Methods cheap enough to run on a thread next to the event loop. Everything else (pdfplumber's
+# pure-Python layout analysis, OCR, docling) is CPU-bound and goes to a process pool.
+THREAD_METHODS = {'pymupdf', 'pymupdf_layout'}
+
+
+def _extract_in_process(pdf_path, method, cache, ocr_dpi, fields, template):
+    # Pool workers OCR their pages serially: the pool is already one process per core
+    ocr_options = {'ocr_dpi': ocr_dpi, 'ocr_workers': 1} if method in OCR_METHODS else {}
+    return extract(pdf_path, method=method, cache=cache, fields=fields, template=template, **ocr_options)
+
+
+def _serve(conn):
+    # Worker process loop: one job at a time, answered with (ok, data or exception). The first
+    # message says the imports are done, so they do not count against a job's timeout.
+    conn.send(None)
+    while True:
+        try:
+            args = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send((True, _extract_in_process(*args)))
+        except Exception as e:
+            conn.send((False, e))
+
+
+class _ProcessWorkers:
+    # Up to `size` long-lived spawn processes that each run one job at a time. Unlike a
+    # ProcessPoolExecutor, a single job can be stopped: when it times out (or its task is
+    # cancelled) its process is terminated, and a fresh one is started for the next job.
+
+    def __init__(self, size=None):
+        self.size = size or os.cpu_count() or 1
+        # spawn: forking a process that is running an event loop and worker threads is unsafe
+        self.context = multiprocessing.get_context('spawn')
+        self.slots = asyncio.Semaphore(self.size)
+        self.idle = []
+        self.running = set()
+        # Threads that wait for replies (and reap terminated processes) off the event loop
+        self.waiters = ThreadPoolExecutor(max_workers=self.size * 2)
+
+    def _start(self):
+        conn, child_conn = self.context.Pipe()
+        process = self.context.Process(target=_serve, args=(child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+        return process, conn
+
+    def _reap(self, worker):
+        process, conn = worker
+        process.join()
+        conn.close()
+
+    def _kill(self, worker):
+        # Terminating the process also wakes the thread still polling its pipe
+        worker[0].terminate()
+        self.waiters.submit(self._reap, worker)
+
+    async def run(self, timeout, *args):
+        # The timeout starts once a process has taken the job, not while it waits for one
+        loop = asyncio.get_running_loop()
+        async with self.slots:
+            started = not self.idle
+            worker = self._start() if started else self.idle.pop()
+            self.running.add(worker)
+            conn = worker[1]
+            try:
+                if started:
+                    await loop.run_in_executor(self.waiters, conn.recv)
+                conn.send(args)
+                if not await loop.run_in_executor(self.waiters, conn.poll, timeout):
+                    raise asyncio.TimeoutError
+                ok, value = conn.recv()
+            except BaseException as e:
+                # close() may already have stopped it
+                if worker in self.running:
+                    self.running.discard(worker)
+                    self._kill(worker)
+                if isinstance(e, (EOFError, BrokenPipeError)):
+                    raise RuntimeError('extraction process died') from None
+                raise
+            self.running.discard(worker)
+            self.idle.append(worker)
+        if not ok:
+            raise value
+        return value
+
+    def close(self):
+        # Stops the processes of abandoned jobs too, without blocking the event loop
+        for worker in self.idle + list(self.running):
+            self._kill(worker)
+        self.idle, self.running = [], set()
+        self.waiters.shutdown(wait=False)
+
+
+async def _iter_paths(paths):
+    if hasattr(paths, '__aiter__'):
+        async for path in paths:
+            yield path
+    else:
+        for path in paths:
+            yield path
+
+
+async def _extract_one(pdf_path, method, cache, ocr_dpi, fields, template, timeout, threads, processes):
+    loop = asyncio.get_running_loop()
+    start = time.monotonic()
+    remaining = timeout
+    name = None
+    try:
+        pdf_path = normalize(pdf_path)
+        name = source_name(pdf_path)
+        if not is_path(pdf_path):
+            # Process pool jobs are pickled, which takes bytes but not memoryviews
+            pdf_path = bytes(pdf_path)
+        if method == 'auto':
+            # Digital statements finish on the thread; only documents that need OCR move to the
+            # process pool, so a slow scan never occupies a thread that fast files are waiting on
+            try:
+                data = await asyncio.wait_for(
+                    loop.run_in_executor(threads, lambda: extract(pdf_path, cache=cache, ocr_dpi=ocr_dpi, allow_ocr=False,
+                                                                  fields=fields, template=template)), timeout)
+            except OCRRequired:
+                if timeout is not None:
+                    remaining = max(0.0, timeout - (time.monotonic() - start))
+                data = await processes.run(remaining, pdf_path, 'auto', cache, ocr_dpi, fields, template)
+        elif method in THREAD_METHODS:
+            data = await asyncio.wait_for(
+                loop.run_in_executor(threads, lambda: extract(pdf_path, method=method, cache=cache, fields=fields,
+                                                              template=template)), timeout)
+        else:
+            data = await processes.run(timeout, pdf_path, method, cache, ocr_dpi, fields, template)
+        record = {'file': name, 'ok': True, 'data': data}
+    except asyncio.TimeoutError:
+        # A thread job cannot be interrupted: it finishes in the background and its result is
+        # dropped. A process job has already been stopped.
+        record = {'file': name, 'ok': False, 'error': f"TimeoutError: no result after {timeout} seconds"}
+    except Exception as e:
+        record = {'file': name, 'ok': False, 'error': f"{type(e).__name__}: {e}"}
+    record['seconds'] = round(time.monotonic() - start, 4)
+    return record
+
+
+async def extract_many(paths, method='auto', max_concurrency=None, timeout=None, cache=None, ocr_dpi=None,
+                       fields=None, template=None, process_workers=None, thread_workers=None):
+    # Async iterator over {file, ok, data | error, seconds} records in completion order.
+    # `paths` may be a sync or async iterable and is consumed lazily: at most `max_concurrency`
+    # documents are in flight, and a new one is only started once a record has been taken.
+    if method != 'auto' and method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}, expected 'auto' or one of {sorted(METHODS)}")
+    if ocr_dpi is not None and method not in OCR_METHODS:
+        raise ValueError(f"ocr_dpi only applies to methods {OCR_METHODS}, not {method!r}")
+    max_concurrency = max_concurrency or os.cpu_count() or 1
+    threads = ThreadPoolExecutor(max_workers=thread_workers or max_concurrency)
+    processes = _ProcessWorkers(process_workers)
+    pending = set()
+    try:
+        async for pdf_path in _iter_paths(paths):
+            if len(pending) >= max_concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+            pending.add(asyncio.ensure_future(
+                _extract_one(pdf_path, method, cache, ocr_dpi, fields, template, timeout, threads, processes)))
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        # Never block the event loop waiting for abandoned jobs
+        threads.shutdown(wait=False, cancel_futures=True)
+        processes.close()
@@ -0,0 +1,114 @@
+import importlib
+
+from .cache import cached_extract
+from .instrument import span, count
+from .source import normalize
+from . import fields as field_pages
+from . import templates
+
+# Backend modules are imported on first use so picking one method never loads the others
+METHODS = {
+    'plumber': 'plumber.extract_pdf_text',
+    'pymupdf': 'pymupdf_method.extract_pdf_text',
+    'pymupdf_layout': 'pymupdf_method.layout',
+    'tesseract': 'tesseract_spacy.extract_pdf_text',
+    'docling': 'docling_v2.extract_pdf_text',
+    'ensemble': 'statement_extractor.ensemble',
+}
+
+AUTO_VERSION = '1'
+AUTO_FIELDS = tuple(field_pages.FIELD_PAGES)
+
+# A page with fewer extractable characters than this is treated as image-only and OCR'd
+MIN_TEXT_CHARS = 20
+# Methods that take ocr_dpi, ocr_workers and ocr_engine
+OCR_METHODS = ('auto', 'tesseract')
+
+
+class OCRRequired(Exception):
+    # Raised by extract(method='auto', allow_ocr=False) for a document with image-only pages
+    def __init__(self, pdf_path, scanned):
+        super().__init__(f"{pdf_path}: pages {scanned} have no text layer")
+        self.pdf_path = pdf_path
+        self.scanned = scanned
+
+
+def load_method(method):
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}, expected 'auto' or one of {sorted(METHODS)}")
+    return importlib.import_module(METHODS[method])
+
+
+def read_routed_pages(pdf_path, fields=None):
+    # One PyMuPDF pass gives both the text-layer check and the lines for every digital page.
+    # Returns the lines of each page read (None for image-only pages) and the 1-based numbers
+    # of the image-only pages; with `fields`, only the pages that can hold them are read.
+    pages, scanned = [], []
+    with load_method('pymupdf').open_document(pdf_path) as doc:
+        for page_no in field_pages.page_indices(fields, doc.page_count):
+            text = doc[page_no].get_text()
+            if len(text.strip()) < MIN_TEXT_CHARS:
+                pages.append(None)
+                scanned.append(page_no + 1)
+            else:
+                pages.append(text.splitlines())
+    return pages, scanned
+
+
+def merge_results(primary, fallback):
+    merged = dict(primary)
+    for key, value in fallback.items():
+        if not merged.get(key):
+            merged[key] = value
+    return merged
+
+
+def _extract_auto(pdf_path, ocr_dpi=None, ocr_workers=None, allow_ocr=True, fields=None, template=None,
+                  ocr_engine=None):
+    pymupdf = load_method('pymupdf')
+    with span('route'):
+        pages, scanned = read_routed_pages(pdf_path, fields)
+    count('pages', len(pages))
+    count('scanned_pages', len(scanned))
+    if not scanned:
+        return pages, field_pages.select(pymupdf.parse_pages(pages, template), fields)
+    if not allow_ocr:
+        raise OCRRequired(pdf_path, scanned)
+    tesseract = load_method('tesseract')
+    dpi = ocr_dpi or tesseract.DEFAULT_DPI
+    engine = ocr_engine or tesseract.DEFAULT_ENGINE
+    ocr_pages = [text.splitlines() for text in
+                 tesseract.iter_ocr_pages(pdf_path, scanned, dpi=dpi, workers=ocr_workers, engine=engine)]
+    digital_pages = [p for p in pages if p is not None]
+    ocr_iter = iter(ocr_pages)
+    pages = [next(ocr_iter) if p is None else p for p in pages]
+    if not digital_pages:
+        return pages, field_pages.select(tesseract.parse_pages(ocr_pages, template), fields)
+    # Mixed document: digital pages keep the PyMuPDF parse, OCR only fills fields it left empty
+    result = merge_results(pymupdf.parse_pages(digital_pages, template), tesseract.parse_pages(ocr_pages, template))
+    return pages, field_pages.select(result, fields)
+
+
+def extract(pdf_path, method='auto', cache=None, ocr_dpi=None, ocr_workers=None, allow_ocr=True, fields=None,
+            template=None, ocr_engine=None):
+    # pdf_path may also be bytes, a memoryview or a binary file object. `fields` limits the
+    # result (and the pages read, OCR'd or converted) to the named fields. `template` forces a
+    # bank layout instead of identifying it from page 1. The ocr_* options apply to 'auto' (for
+    # image-only pages) and 'tesseract'; `ocr_engine` picks the OCR backend (tesseract by default).
+    ocr_options = {'dpi': ocr_dpi, 'workers': ocr_workers, 'engine': ocr_engine}
+    if method not in OCR_METHODS and any(v is not None for v in ocr_options.values()):
+        raise ValueError(f"ocr_dpi, ocr_workers and ocr_engine only apply to methods {OCR_METHODS}, not {method!r}")
+    if method != 'auto':
+        kwargs = {k: v for k, v in ocr_options.items() if v is not None}
+        return load_method(method).extract_pdf_data(normalize(pdf_path), cache=cache, fields=fields,
+                                                    template=template, **kwargs)
+    fields = field_pages.check_fields(fields, AUTO_FIELDS)
+    version = f"{AUTO_VERSION}-dpi{ocr_dpi or 'default'}"
+    if ocr_engine:
+        version = f"{version}-{ocr_engine}"
+    version = field_pages.cache_version(version, fields)
+    version = templates.cache_version(version, template)
+    return cached_extract(cache, pdf_path, 'auto', version,
+                          lambda path: _extract_auto(path, ocr_dpi=ocr_dpi, ocr_workers=ocr_workers,
+                                                     allow_ocr=allow_ocr, fields=fields, template=template,
+                                                     ocr_engine=ocr_engine))
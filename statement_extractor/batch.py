@@ -0,0 +1,175 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from statement_extractor.api import AUTO_VERSION, METHODS, extract, load_method
+from statement_extractor.cache import ResultCache
+from statement_extractor.manifest import Manifest, FAILED
+from statement_extractor.pool import imap_unordered
+from statement_extractor.source import digest, iter_pdf_paths
+from statement_extractor import fields as field_pages
+from statement_extractor import templates
+
+# Checkpointed batch runs. Every document gets a row in a SQLite manifest (path, size, mtime,
+# content hash, status, extractor, output file) that is committed as each result comes in, so a
+# run that dies at 80% loses only the documents that were in flight.
+#
+#   (default)        extract every file under SOURCE
+#   --resume         skip files already extracted by the same extractor and unchanged since;
+#                    new, changed and interrupted files are extracted, failed ones are left alone
+#   --retry-failed   extract only the files the manifest records as failed (add --resume to
+#                    also pick up new and changed files under SOURCE)
+
+
+def extractor_id(method, fields=None, template=None):
+    # Part of the manifest row: a parser upgrade or a different field selection is a change too
+    version = AUTO_VERSION if method == 'auto' else load_method(method).EXTRACTOR_VERSION
+    version = templates.cache_version(field_pages.cache_version(version, fields), template)
+    return f"{method}:{version}"
+
+
+def output_path(output_dir, sha256, extractor):
+    # One file per (content, extractor): the same PDF extracted with another method, field
+    # selection or template gets its own result instead of overwriting this one
+    tag = hashlib.sha256(extractor.encode()).hexdigest()[:12]
+    return os.path.join(output_dir, sha256[:2], f"{sha256}.{tag}.json")
+
+
+def write_output(output_dir, sha256, extractor, data):
+    # Written atomically; re-extraction by the same extractor overwrites it in place
+    path = output_path(output_dir, sha256, extractor)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({'sha256': sha256, 'extractor': extractor, 'data': data}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _run_one(pdf_path, method, extractor, output_dir, cache, fields, template=None):
+    start = time.time()
+    record = {'file': pdf_path}
+    try:
+        # stat before hashing: if the file changes underneath, the manifest keeps the older
+        # mtime and the next --resume re-checks it
+        st = os.stat(pdf_path)
+        record.update(size=st.st_size, mtime_ns=st.st_mtime_ns, sha256=digest(pdf_path))
+        data = extract(pdf_path, method=method, cache=cache, fields=fields, template=template)
+        record['output'] = write_output(output_dir, record['sha256'], extractor, data)
+        record['ok'] = True
+    except Exception as e:
+        record['ok'] = False
+        record['error'] = f"{type(e).__name__}: {e}"
+    record['seconds'] = round(time.time() - start, 4)
+    return record
+
+
+def plan(manifest, source, extractor, resume=False, retry_failed=False):
+    # Yields (path, stat) for every file this run has to extract
+    seen = set()
+    if retry_failed:
+        for pdf_path in manifest.paths(FAILED):
+            seen.add(pdf_path)
+            try:
+                yield pdf_path, os.stat(pdf_path)
+            except FileNotFoundError:
+                continue
+        if not resume:
+            return
+    for pdf_path in iter_pdf_paths(source) if source else ():
+        if pdf_path in seen:
+            continue
+        st = os.stat(pdf_path)
+        if resume:
+            row = manifest.get(pdf_path)
+            if row is not None and row['status'] == FAILED and not retry_failed:
+                if (row['size'], row['mtime_ns'], row['extractor']) == (st.st_size, st.st_mtime_ns, extractor):
+                    continue
+            if manifest.is_current(pdf_path, extractor, st):
+                continue
+        yield pdf_path, st
+
+
+def run(source, manifest_path, output_dir, method='auto', resume=False, retry_failed=False, workers=None,
+        cache=None, fields=None, progress=None):
+    if method != 'auto' and method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}, expected 'auto' or one of {sorted(METHODS)}")
+    extractor = extractor_id(method, fields)
+    ok = failed = 0
+    with Manifest(manifest_path) as manifest:
+
+        def jobs():
+            # Read as files are handed to a worker (two per worker in flight), so rows only turn
+            # 'running' when their file is actually being extracted
+            for pdf_path, st in plan(manifest, source, extractor, resume, retry_failed):
+                manifest.mark_running(pdf_path, extractor, st)
+                yield pdf_path, method, extractor, output_dir, cache, fields
+
+        # A worker that dies (e.g. killed by the OOM killer) fails only its own file, see pool.imap_unordered
+        for (pdf_path, *_), record, error in imap_unordered(_run_one, jobs(), workers):
+            if error is not None:
+                record = {'file': pdf_path, 'ok': False, 'error': f"{type(error).__name__}: {error}"}
+            manifest.record(pdf_path, record['ok'], sha256=record.get('sha256'), output=record.get('output'),
+                            error=record.get('error'), seconds=record.get('seconds'),
+                            size=record.get('size'), mtime_ns=record.get('mtime_ns'))
+            if record['ok']:
+                ok += 1
+            else:
+                failed += 1
+            if progress is not None:
+                progress(record)
+        counts = manifest.counts()
+    return ok, failed, counts
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Checkpointed, resumable batch extraction of statement PDFs.')
+    parser.add_argument('source', nargs='?', help='directory (searched recursively) or glob of statement PDFs')
+    parser.add_argument('--manifest', default='batch_manifest.sqlite',
+                        help='SQLite file recording the state of every document')
+    parser.add_argument('--output-dir', default='batch_results',
+                        help='directory the per-document JSON results are written to')
+    parser.add_argument('--method', default='auto', choices=['auto'] + sorted(METHODS))
+    parser.add_argument('--resume', action='store_true',
+                        help='skip documents already extracted and unchanged since')
+    parser.add_argument('--retry-failed', action='store_true',
+                        help='re-extract the documents the manifest records as failed')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='always re-extract instead of reusing results cached by content hash')
+    field_pages.add_arguments(parser, tuple(field_pages.FIELD_PAGES))
+    args = parser.parse_args(argv)
+    if not args.source and not args.retry_failed:
+        parser.error('SOURCE is required unless --retry-failed is given')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache = None if args.no_cache else ResultCache.from_env()
+    start = time.time()
+
+    def progress(record):
+        if not record['ok']:
+            print(f"[batch] {record['file']}: {record['error']}", file=sys.stderr)
+
+    ok, failed, counts = run(args.source, args.manifest, args.output_dir, method=args.method, resume=args.resume,
+                             retry_failed=args.retry_failed, workers=args.workers, cache=cache,
+                             fields=args.fields, progress=progress)
+    elapsed = time.time() - start
+    totals = ', '.join(f"{n} {status}" for status, n in sorted(counts.items()))
+    print(f"[batch] {ok + failed} files extracted in {elapsed:.2f} seconds ({ok} ok, {failed} failed); "
+          f"manifest: {totals}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import os
+import json
+import hashlib
+import tempfile
+
+from .instrument import span, count
+from .source import normalize, digest as source_digest
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction falls back to best effort without a lock
+    fcntl = None
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'pdf_txt_extraction')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class ResultCache:
+    # On-disk cache of extraction results keyed by PDF content hash + extractor name + version.
+    # Each entry is one JSON file holding the raw page lines and the final result. Writes go
+    # through a temp file + os.replace so concurrent writers never expose a partial entry, and
+    # the least recently used entries (by mtime, bumped on every hit) are evicted past max_bytes.
+    # Extractors bump their EXTRACTOR_VERSION when parser output changes to invalidate old entries.
+
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self._approx_size = None
+        os.makedirs(self.root, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        # PDF_EXTRACT_CACHE=0 disables caching; PDF_EXTRACT_CACHE_DIR / PDF_EXTRACT_CACHE_MAX_MB tune it
+        if os.environ.get('PDF_EXTRACT_CACHE', '1').lower() in ('0', 'false', 'off', 'no'):
+            return None
+        max_mb = os.environ.get('PDF_EXTRACT_CACHE_MAX_MB')
+        max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+        return cls(os.environ.get('PDF_EXTRACT_CACHE_DIR'), max_bytes)
+
+    def __getstate__(self):
+        # Only the location and cap travel to worker processes; each one rebuilds its size estimate
+        return {'root': self.root, 'max_bytes': self.max_bytes, '_approx_size': None}
+
+    def key(self, digest, extractor, version):
+        return hashlib.sha256(f"{digest}:{extractor}:{version}".encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + '.json')
+
+    def get(self, digest, extractor, version):
+        path = self._path(self.key(digest, extractor, version))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            # Missing, evicted between open and utime, or a torn file from a crashed writer
+            return None
+        return entry
+
+    def put(self, digest, extractor, version, pages, result):
+        path = self._path(self.key(digest, extractor, version))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {'extractor': extractor, 'version': version, 'sha256': digest, 'lines': pages, 'result': result}
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        if self._approx_size is None:
+            self._approx_size = self._total_size()
+        else:
+            self._approx_size += size
+        if self._approx_size > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        for sub in os.scandir(self.root):
+            if not sub.is_dir():
+                continue
+            for e in os.scandir(sub.path):
+                if not e.name.endswith('.json'):
+                    continue
+                try:
+                    st = e.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, e.path))
+        return entries
+
+    def _total_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        lock_file = open(os.path.join(self.root, '.evict.lock'), 'w')
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Another process is already evicting
+                    return
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self._approx_size = total
+        finally:
+            lock_file.close()
+
+    def clear(self):
+        for _, _, path in self._entries():
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        self._approx_size = 0
+
+
+def cached_extract(cache, pdf_path, extractor, version, extract, should_store=None):
+    # extract(pdf_path) must return (pages, result) where pages is a list of per-page line lists.
+    # pdf_path may be any source accepted by statement_extractor.source; entries are keyed by content.
+    # should_store(result), when given, keeps a degraded result out of the cache by returning False.
+    pdf_path = normalize(pdf_path)
+    if cache is None:
+        return extract(pdf_path)[1]
+    with span('cache_hash'):
+        digest = source_digest(pdf_path)
+    with span('cache_lookup'):
+        entry = cache.get(digest, extractor, version)
+    if entry is not None:
+        count('cache_hit')
+        return entry['result']
+    count('cache_miss')
+    pages, result = extract(pdf_path)
+    if should_store is not None and not should_store(result):
+        count('cache_skip')
+        return result
+    with span('cache_store'):
+        cache.put(digest, extractor, version, pages, result)
+    return result
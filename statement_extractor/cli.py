@@ -0,0 +1,105 @@
+import sys
+import json
+import time
+import argparse
+
+from . import instrument
+from . import fields as field_pages
+from . import templates
+from .api import METHODS, OCR_METHODS, extract, load_method
+from .cache import ResultCache
+
+# One entry point for every method: python -m statement_extractor extract --method pymupdf file.pdf
+# Only the selected backend is imported, and the time that took is reported on stderr.
+
+# Modules the digital fast path must never load (see benchmarks/check_imports.py)
+OCR_AND_ML_MODULES = ('docling', 'torch', 'pytesseract', 'pdf2image', 'easyocr', 'cv2', 'spacy')
+# Reported by --import-report when loaded, slowest first
+HEAVY_MODULES = OCR_AND_ML_MODULES + ('pdfplumber', 'pdfminer', 'pandas', 'pyarrow', 'numpy', 'PIL', 'fitz')
+
+# Names from tesseract_spacy.engines, listed here so --help does not import the OCR stack
+OCR_ENGINES = ('easyocr', 'tesseract')
+
+# Backends imported up front for each method; 'auto' only needs OCR for image-only pages
+PRELOAD = {
+    'auto': ('pymupdf',),
+    'ensemble': ('plumber', 'pymupdf', 'ensemble'),
+}
+
+
+def loaded_heavy_modules():
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def import_backends(method):
+    start = time.perf_counter()
+    for backend in PRELOAD.get(method, (method,)):
+        load_method(backend)
+    return time.perf_counter() - start
+
+
+def extract_command(args):
+    import_seconds = import_backends(args.method)
+    print(f"[cli] {args.method} backend imported in {import_seconds:.3f} seconds", file=sys.stderr)
+    cache = None if args.no_cache else ResultCache.from_env()
+    for pdf_path in args.pdf_paths:
+        start = time.perf_counter()
+        with instrument.recording_from_args(args, extractor=args.method):
+            kwargs = {'ocr_dpi': args.ocr_dpi, 'ocr_engine': args.ocr_engine} if args.method in OCR_METHODS else {}
+            result = extract(pdf_path, method=args.method, cache=cache, fields=args.fields,
+                             template=args.template, **kwargs)
+        if args.compact:
+            print(json.dumps({'file': pdf_path, 'data': result}, ensure_ascii=False, separators=(',', ':')))
+        else:
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+        print(f"[cli] {pdf_path} extracted in {time.perf_counter() - start:.3f} seconds", file=sys.stderr)
+    if args.import_report:
+        report = {'method': args.method, 'import_seconds': round(import_seconds, 6),
+                  'heavy_modules': loaded_heavy_modules()}
+        print(json.dumps(report), file=sys.stderr)
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m statement_extractor',
+                                     description='Extract bank statement data with any method.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ex = commands.add_parser('extract', help='extract one or more PDFs and print the results as JSON')
+    ex.add_argument('pdf_paths', nargs='+', metavar='PDF')
+    ex.add_argument('--method', default='auto', choices=['auto'] + sorted(METHODS))
+    ex.add_argument('--template', choices=sorted(templates.REGISTRY.templates), default=None,
+                    help='bank layout to use instead of identifying it from page 1')
+    ex.add_argument('--ocr-dpi', type=int, default=None, help='rasterization DPI for OCR (auto, tesseract)')
+    ex.add_argument('--ocr-engine', choices=OCR_ENGINES, default=None,
+                    help='OCR backend (auto, tesseract; default: tesseract)')
+    ex.add_argument('--no-cache', action='store_true',
+                    help='always re-extract instead of reusing results cached by content hash')
+    ex.add_argument('--compact', action='store_true', help='one JSON line {"file", "data"} per PDF')
+    ex.add_argument('--import-report', action='store_true',
+                    help='print the backend import time and the heavy modules that got loaded (stderr, JSON)')
+    field_pages.add_arguments(ex, tuple(field_pages.FIELD_PAGES))
+    instrument.add_arguments(ex)
+
+    # Listed for --help; the arguments are parsed by statement_extractor.batch itself
+    commands.add_parser('batch', add_help=False, help='checkpointed batch run (see batch --help)')
+    commands.add_parser('queue', add_help=False,
+                        help='enqueue jobs or run queue workers (see queue --help)')
+    commands.add_parser('methods', help='list the available methods')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'batch':
+        from .batch import main as batch_main
+        return batch_main(argv[1:])
+    if argv and argv[0] == 'queue':
+        from .worker import main as queue_main
+        return queue_main(argv[1:])
+    args = parse_args(argv)
+    if args.command == 'methods':
+        for method in ['auto'] + sorted(METHODS):
+            print(method)
+        return 0
+    return extract_command(args)
@@ -0,0 +1,225 @@
+import os
+import sys
+import json
+import time
+import argparse
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from statement_extractor.api import load_method
+from statement_extractor.cache import ResultCache, cached_extract
+from statement_extractor import instrument
+from statement_extractor.instrument import span, count
+from statement_extractor.source import is_path, normalize, source_name
+from statement_extractor import fields as field_pages
+from statement_extractor import templates
+
+# Ensemble: plumber and PyMuPDF run side by side on one in-memory copy of the PDF and each field
+# is decided by agreement. Only fields the two disagree on (or both leave empty) are sent to a
+# slower method, with `fields=` so it reads only the pages those fields live on.
+
+PDF_PATH = os.path.join(ROOT_DIR, 'data', 'tdbank.pdf')
+EXTRACTOR_NAME = 'ensemble'
+EXTRACTOR_VERSION = '1'
+FAST_METHODS = ('plumber', 'pymupdf')
+FIELDS = ('customer_name', 'customer_address', 'statement_period', 'account_summary', 'daily_balance_summary')
+DEFAULT_ESCALATE = 'docling'
+# Used instead when neither fast method found anything: the PDF has no usable text layer
+SCANNED_ESCALATE = 'tesseract'
+# Which fast method wins a dispute nothing could settle
+PREFERRED = {
+    'customer_name': 'plumber',
+    'customer_address': 'plumber',
+    'statement_period': 'pymupdf',
+    'account_summary': 'pymupdf',
+    'daily_balance_summary': 'plumber',
+}
+
+
+class EnsembleError(RuntimeError):
+    # Raised by extract_pdf_data(strict=True) when a fast or escalation method failed; the
+    # degraded result is still attached
+    def __init__(self, pdf_path, errors, result):
+        super().__init__(f"{pdf_path}: {'; '.join(f'{m} failed: {e}' for m, e in errors.items())}")
+        self.errors = errors
+        self.result = result
+
+
+def is_empty(value):
+    if isinstance(value, dict):
+        return all(is_empty(v) for v in value.values())
+    return value is None or value == '' or value == []
+
+
+def canonical(value):
+    # Whitespace differences between text layers are not a disagreement
+    if isinstance(value, str):
+        return ' '.join(value.split())
+    if isinstance(value, list):
+        return [canonical(v) for v in value]
+    if isinstance(value, dict):
+        return {k: canonical(v) for k, v in value.items() if v is not None}
+    return value
+
+
+def merge_dicts(a, b):
+    # account_summary: a key only one method found is kept; the same key with two values is a conflict
+    merged = dict(a or {})
+    for key, value in (b or {}).items():
+        if merged.get(key) is None:
+            merged[key] = value
+        elif value is not None and canonical(merged[key]) != canonical(value):
+            return None
+    return merged
+
+
+def vote(results):
+    # results: {method: result} from the fast methods. Returns the agreed values and the disputed
+    # fields, each disputed field mapped to its candidates in FAST_METHODS order.
+    agreed, disputed = {}, {}
+    for field in FIELDS:
+        # A method that failed counts as an empty candidate, so the survivor alone never "agrees"
+        values = [results[m].get(field) if m in results else None for m in FAST_METHODS]
+        present = [v for v in values if not is_empty(v)]
+        if not present:
+            disputed[field] = values
+        elif field == 'account_summary' and len(present) == 2 and merge_dicts(*values) is not None:
+            agreed[field] = merge_dicts(*values)
+        elif len(present) == len(values) and all(canonical(v) == canonical(present[0]) for v in present):
+            agreed[field] = present[0]
+        else:
+            disputed[field] = values
+    return agreed, disputed
+
+
+def resolve(field, candidates, escalated):
+    # The escalated value breaks the tie by siding with one candidate; failing that it is used
+    # on its own, and failing that the preferred fast method's value is kept
+    by_method = dict(zip(FAST_METHODS, candidates))
+    if escalated is not None and not is_empty(escalated):
+        for method, value in by_method.items():
+            if not is_empty(value) and canonical(value) == canonical(escalated):
+                return value, method
+        return escalated, 'escalated'
+    preferred = PREFERRED[field]
+    if not is_empty(by_method.get(preferred)):
+        return by_method[preferred], preferred
+    for method, value in by_method.items():
+        if not is_empty(value):
+            return value, method
+    return candidates[0] if candidates else None, None
+
+
+def load_bytes(pdf_path):
+    # One copy of the document shared by every method's thread
+    pdf_path = normalize(pdf_path)
+    if is_path(pdf_path):
+        with open(pdf_path, 'rb') as f:
+            return f.read()
+    return pdf_path
+
+
+def run_fast(data, fields=None, template=None):
+    def run(method):
+        wanted = None if fields is None else [f for f in fields if f in load_method(method).FIELDS]
+        with span(method):
+            return load_method(method).extract_pdf_data(data, fields=wanted, template=template)
+    # Import on this thread: concurrent first imports of the backends would serialize anyway
+    for method in FAST_METHODS:
+        load_method(method)
+    with ThreadPoolExecutor(max_workers=len(FAST_METHODS)) as executor:
+        # Each thread gets a copy of the caller's context so its spans land in the same recording
+        futures = {method: executor.submit(contextvars.copy_context().run, run, method) for method in FAST_METHODS}
+        results, errors = {}, {}
+        for method, future in futures.items():
+            try:
+                results[method] = future.result()
+            except Exception as e:
+                errors[method] = f"{type(e).__name__}: {e}"
+    if not results:
+        raise RuntimeError(f"every fast method failed: {errors}")
+    return results, errors
+
+
+def extract_ensemble(pdf_path, fields=None, template=None, escalate=DEFAULT_ESCALATE):
+    # Returns (result, sources): sources maps each field to 'agreed', the method whose value was
+    # kept, or 'escalated' when the slow method's value was used on its own
+    fields = field_pages.check_fields(fields, FIELDS)
+    data = load_bytes(pdf_path)
+    results, errors = run_fast(data, fields, template)
+    agreed, disputed = vote(results)
+    wanted = fields or FIELDS
+    disputed = {field: values for field, values in disputed.items() if field in wanted}
+    sources = {field: 'agreed' for field in agreed}
+    count('disputed_fields', len(disputed))
+    escalated = {}
+    if disputed and escalate:
+        all_empty = all(is_empty(r.get(f)) for r in results.values() for f in wanted)
+        method = SCANNED_ESCALATE if all_empty else escalate
+        try:
+            slow = load_method(method)
+            slow_fields = [field for field in disputed if field in slow.FIELDS]
+            if slow_fields:
+                with span('escalate'):
+                    escalated = slow.extract_pdf_data(data, fields=slow_fields, template=template)
+        except Exception as e:
+            # Missing optional backend or a failed conversion: settle on the fast results
+            errors[method] = f"{type(e).__name__}: {e}"
+    result = dict(agreed)
+    for field, candidates in disputed.items():
+        result[field], sources[field] = resolve(field, candidates, escalated.get(field))
+    result = {field: result.get(field) for field in FIELDS}
+    if errors:
+        sources['errors'] = errors
+    return field_pages.select(result, fields), sources
+
+
+def extract_pdf_data(pdf_path, cache=None, fields=None, template=None, escalate=DEFAULT_ESCALATE, strict=False):
+    # A method failure is reported on stderr, or raised as EnsembleError with strict=True, and the
+    # result it degraded is never cached, so the next call tries again
+    fields = field_pages.check_fields(fields, FIELDS)
+    pdf_path = normalize(pdf_path)
+    version = templates.cache_version(field_pages.cache_version(f"{EXTRACTOR_VERSION}-{escalate}", fields), template)
+    errors = {}
+
+    def extract(path):
+        result, sources = extract_ensemble(path, fields, template, escalate)
+        errors.update(sources.get('errors', {}))
+        return [], result
+
+    # Only the voted result is cached; the methods it runs are called without a cache
+    result = cached_extract(cache, pdf_path, EXTRACTOR_NAME, version, extract, should_store=lambda _: not errors)
+    if errors:
+        count('method_errors', len(errors))
+        if strict:
+            raise EnsembleError(source_name(pdf_path), errors, result)
+        for method, error in errors.items():
+            print(f"[ensemble] {source_name(pdf_path)}: {method} failed: {error}", file=sys.stderr)
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Extract statement data by voting between plumber and PyMuPDF.')
+    parser.add_argument('pdf_path', nargs='?', default=PDF_PATH)
+    parser.add_argument('--escalate', default=DEFAULT_ESCALATE,
+                        help="method that settles disputed fields ('docling', 'tesseract', 'pymupdf_layout'), "
+                             "or 'none' to keep the preferred fast value")
+    field_pages.add_arguments(parser, FIELDS)
+    instrument.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    escalate = None if args.escalate == 'none' else args.escalate
+    start = time.time()
+    with instrument.recording_from_args(args, extractor=EXTRACTOR_NAME):
+        result, sources = extract_ensemble(args.pdf_path, fields=args.fields, escalate=escalate)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(json.dumps(sources, indent=2), file=sys.stderr)
+    elapsed = time.time() - start
+    print(f"\n[ensemble] Extraction completed in {elapsed:.2f} seconds.")
@@ -0,0 +1,64 @@
+# Where each field lives in a TD statement. With `fields=[...]` the extractors open, extract
+# and OCR only the pages that can hold the requested fields: the header fields are on page 1,
+# the daily balance summary is in the last 2 pages, and checks can be anywhere in the
+# DAILY ACCOUNT ACTIVITY section.
+FIRST_PAGE, LAST_TWO_PAGES, ALL_PAGES = 'first', 'last2', 'all'
+
+FIELD_PAGES = {
+    'customer_name': FIRST_PAGE,
+    'customer_address': FIRST_PAGE,
+    'statement_period': FIRST_PAGE,
+    'account_summary': FIRST_PAGE,
+    'daily_balance_summary': LAST_TWO_PAGES,
+    'checks': ALL_PAGES,
+}
+
+
+def check_fields(fields, available):
+    # None means every field the method extracts, with no page selection
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    fields = tuple(fields)
+    unknown = [field for field in fields if field not in available]
+    if unknown or not fields:
+        raise ValueError(f"Unknown fields {unknown}, expected some of {list(available)}")
+    return fields
+
+
+def header_only(fields):
+    return fields is not None and all(FIELD_PAGES[field] == FIRST_PAGE for field in fields)
+
+
+def page_indices(fields, page_count):
+    # 0-based, ascending
+    if fields is None:
+        return list(range(page_count))
+    wanted = set()
+    for field in fields:
+        where = FIELD_PAGES[field]
+        if where == ALL_PAGES:
+            return list(range(page_count))
+        if where == FIRST_PAGE:
+            wanted.add(0)
+        else:
+            wanted.update(range(max(0, page_count - 2), page_count))
+    return sorted(i for i in wanted if i < page_count)
+
+
+def select(result, fields):
+    if fields is None:
+        return result
+    # A field the method (or, in auto mode, the route taken) does not produce comes back as None
+    return {field: result.get(field) for field in fields}
+
+
+def cache_version(version, fields):
+    return version if fields is None else f"{version}-fields-{','.join(sorted(fields))}"
+
+
+def add_arguments(parser, available):
+    parser.add_argument('--fields', type=lambda s: s.split(','), default=None,
+                        help=f"comma-separated fields to extract, from {','.join(available)}; "
+                             "only the pages that can hold them are read")
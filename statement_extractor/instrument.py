@@ -0,0 +1,187 @@
+import io
+import os
+import sys
+import json
+import time
+import tempfile
+import contextvars
+import tracemalloc
+from contextlib import contextmanager
+
+# Stage timing shared by all extractors. Spans and counters are only recorded inside a
+# `recording()` block; everywhere else span()/count() are near no-ops, so the extractors
+# can stay instrumented in production code paths.
+
+_current = contextvars.ContextVar('pdf_extract_recorder', default=None)
+
+PROFILE_TOP_N = 25
+
+
+class Recorder:
+    def __init__(self, profile=False, trace_memory=False):
+        self.spans = {}
+        self.counters = {}
+        self.labels = {}
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.profile_stats = None
+        self.memory_peak = None
+
+    def add_span(self, name, seconds):
+        stats = self.spans.get(name)
+        if stats is None:
+            self.spans[name] = {'calls': 1, 'seconds': seconds, 'max_seconds': seconds}
+        else:
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            if seconds > stats['max_seconds']:
+                stats['max_seconds'] = seconds
+
+    def incr(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self):
+        total = self.elapsed if self.elapsed is not None else time.perf_counter() - self.started
+        report = {
+            'labels': dict(self.labels),
+            'total_seconds': round(total, 6),
+            'spans': {name: {'calls': s['calls'], 'seconds': round(s['seconds'], 6),
+                             'max_seconds': round(s['max_seconds'], 6)} for name, s in self.spans.items()},
+            'counters': dict(self.counters),
+        }
+        if self.profile_stats is not None:
+            report['profile'] = self.profile_stats
+        if self.memory_peak is not None:
+            report['tracemalloc_peak_bytes'] = self.memory_peak
+        return report
+
+    def to_prometheus(self, prefix='pdf_extract'):
+        def labels(**extra):
+            pairs = sorted(self.labels.items()) + sorted(extra.items())
+            return '{' + ','.join('%s="%s"' % (k, v) for k, v in pairs) + '}'
+        out = [f'# TYPE {prefix}_seconds gauge',
+               f'{prefix}_seconds{labels()} {self.report()["total_seconds"]}',
+               f'# TYPE {prefix}_span_seconds gauge']
+        for name, s in self.spans.items():
+            out.append(f'{prefix}_span_seconds{labels(span=name)} {s["seconds"]:.6f}')
+        out.append(f'# TYPE {prefix}_span_calls gauge')
+        for name, s in self.spans.items():
+            out.append(f'{prefix}_span_calls{labels(span=name)} {s["calls"]}')
+        out.append(f'# TYPE {prefix}_count gauge')
+        for name, n in self.counters.items():
+            out.append(f'{prefix}_count{labels(name=name)} {n}')
+        if self.memory_peak is not None:
+            out.append(f'# TYPE {prefix}_tracemalloc_peak_bytes gauge')
+            out.append(f'{prefix}_tracemalloc_peak_bytes{labels()} {self.memory_peak}')
+        return '\n'.join(out) + '\n'
+
+
+@contextmanager
+def recording(profile=False, trace_memory=False, **labels):
+    rec = Recorder(profile=profile, trace_memory=trace_memory)
+    rec.labels.update(labels)
+    token = _current.set(rec)
+    profiler = None
+    if profile:
+        # Imported only when asked for: pstats alone is a noticeable share of CLI startup
+        import cProfile
+        profiler = cProfile.Profile()
+    started_tracemalloc = trace_memory and not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    if trace_memory:
+        tracemalloc.reset_peak()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield rec
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            import pstats
+            buf = io.StringIO()
+            pstats.Stats(profiler, stream=buf).sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+            rec.profile_stats = buf.getvalue()
+        if trace_memory:
+            rec.memory_peak = tracemalloc.get_traced_memory()[1]
+            if started_tracemalloc:
+                tracemalloc.stop()
+        rec.elapsed = time.perf_counter() - rec.started
+        _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def span(name):
+    rec = _current.get()
+    if rec is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        rec.add_span(name, time.perf_counter() - start)
+
+
+def count(name, n=1):
+    rec = _current.get()
+    if rec is not None:
+        rec.incr(name, n)
+
+
+def add_span(name, seconds):
+    # For stages timed elsewhere, e.g. inside a worker process
+    rec = _current.get()
+    if rec is not None:
+        rec.add_span(name, seconds)
+
+
+def write_report(rec, path):
+    # *.prom is written in Prometheus text exposition format (for the node_exporter textfile
+    # collector), anything else as JSON. The file is replaced atomically so scrapers never
+    # see a partial write.
+    if path.endswith('.prom'):
+        payload = rec.to_prometheus()
+    else:
+        payload = json.dumps(rec.report(), indent=2)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def rss_bytes():
+    # Current resident set size. Without /proc (macOS) this falls back to the peak RSS.
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes on Linux
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def add_arguments(parser):
+    parser.add_argument('--timing', metavar='FILE',
+                        help='write a per-stage timing report (JSON, or Prometheus text if FILE ends in .prom)')
+    parser.add_argument('--profile', action='store_true', help='include cProfile output in the timing report')
+    parser.add_argument('--trace-memory', action='store_true', help='include the tracemalloc peak in the timing report')
+
+
+@contextmanager
+def recording_from_args(args, **labels):
+    # Records only when --timing was given; `args` may be None for programmatic callers
+    if args is None or not args.timing:
+        yield None
+        return
+    with recording(profile=args.profile, trace_memory=args.trace_memory, **labels) as rec:
+        yield rec
+    write_report(rec, args.timing)
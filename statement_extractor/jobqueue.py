@@ -0,0 +1,238 @@
+import json
+import time
+import uuid
+import sqlite3
+from abc import ABC, abstractmethod
+
+# Work queue for spreading extraction over several worker processes or machines. A worker leases
+# a job for a visibility timeout; a job that is neither acked nor nacked before its lease expires
+# (the worker crashed or hung) becomes visible again and is delivered to another worker, so every
+# job is processed at least once. A job that has been delivered max_attempts times without
+# succeeding is moved to the dead letters instead of being retried forever.
+#
+# Backends are picked by URL scheme (sqlite:///path/queue.sqlite). Another broker plugs in by
+# subclassing JobQueue and calling register_backend.
+
+QUEUED, LEASED, DONE, DEAD = 'queued', 'leased', 'done', 'dead'
+
+DEFAULT_VISIBILITY_TIMEOUT = 300.0
+DEFAULT_MAX_ATTEMPTS = 5
+# Delay before a failed job is retried; doubles with every attempt
+DEFAULT_RETRY_DELAY = 5.0
+
+
+class Job:
+    __slots__ = ('id', 'payload', 'attempts', 'lease')
+
+    def __init__(self, id, payload, attempts, lease):
+        self.id = id
+        self.payload = payload
+        self.attempts = attempts
+        self.lease = lease
+
+    def __repr__(self):
+        return f"Job({self.id!r}, {self.payload!r}, attempts={self.attempts})"
+
+
+class JobQueue(ABC):
+    # Interface shared by every backend; a backend missing one of the abstract methods fails when
+    # it is instantiated. Payloads are JSON-serializable dicts. ack, nack and extend take the
+    # leased Job and return False when the lease has already expired and the job may be running
+    # elsewhere.
+
+    @abstractmethod
+    def put(self, payload):
+        # Adds a job that is visible at once; returns its id
+        ...
+
+    def put_many(self, payloads):
+        for payload in payloads:
+            self.put(payload)
+
+    @abstractmethod
+    def get(self, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+        # Leases the next visible job for visibility_timeout seconds and returns it as a Job with
+        # its delivery count in attempts, or returns None when no job is visible
+        ...
+
+    @abstractmethod
+    def ack(self, job, result=None):
+        # Marks the job done and stores the JSON-serializable result
+        ...
+
+    @abstractmethod
+    def nack(self, job, error=None, retry=True):
+        # Records the error and makes the job visible again after a backoff, or moves it to the
+        # dead letters once it has no attempts left or with retry=False (it can never succeed)
+        ...
+
+    @abstractmethod
+    def extend(self, job, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+        # Keeps the job invisible for another visibility_timeout seconds from now
+        ...
+
+    @abstractmethod
+    def dead_letters(self):
+        # [{'id', 'payload', 'attempts', 'error'}] for every dead job
+        ...
+
+    @abstractmethod
+    def requeue_dead(self):
+        # Makes every dead job visible again with no attempts used; returns how many
+        ...
+
+    @abstractmethod
+    def counts(self):
+        # {status: number of jobs}
+        ...
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease TEXT,
+    visible_at REAL NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_visible ON jobs (status, visible_at);
+'''
+
+
+class SQLiteQueue(JobQueue):
+    # Works offline on one machine: every process opens its own connection and leases are taken
+    # under BEGIN IMMEDIATE, so two workers never lease the same job at the same time. The file
+    # must be on a local disk; SQLite locking is not reliable over NFS.
+
+    def __init__(self, path, max_attempts=DEFAULT_MAX_ATTEMPTS, retry_delay=DEFAULT_RETRY_DELAY):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # Autocommit mode; transactions are opened explicitly where a read must stay consistent
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def put(self, payload):
+        now = time.time()
+        cur = self.conn.execute(
+            'INSERT INTO jobs (payload, status, visible_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+            (json.dumps(payload), QUEUED, now, now, now))
+        return cur.lastrowid
+
+    def put_many(self, payloads):
+        now = time.time()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            self.conn.executemany(
+                'INSERT INTO jobs (payload, status, visible_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+                [(json.dumps(payload), QUEUED, now, now, now) for payload in payloads])
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    def get(self, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+        now = time.time()
+        lease = uuid.uuid4().hex
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            while True:
+                # Queued jobs and leased jobs whose worker let the lease expire
+                row = self.conn.execute(
+                    '''SELECT id, payload, attempts FROM jobs WHERE status IN (?, ?) AND visible_at <= ?
+                       ORDER BY visible_at, id LIMIT 1''', (QUEUED, LEASED, now)).fetchone()
+                if row is None:
+                    self.conn.execute('COMMIT')
+                    return None
+                if row['attempts'] >= self.max_attempts:
+                    # Its last delivery timed out: no attempts left
+                    self.conn.execute(
+                        'UPDATE jobs SET status = ?, lease = NULL, error = COALESCE(error, ?), updated_at = ? '
+                        'WHERE id = ?', (DEAD, 'visibility timeout expired', now, row['id']))
+                    continue
+                self.conn.execute(
+                    'UPDATE jobs SET status = ?, attempts = attempts + 1, lease = ?, visible_at = ?, updated_at = ? '
+                    'WHERE id = ?', (LEASED, lease, now + visibility_timeout, now, row['id']))
+                self.conn.execute('COMMIT')
+                return Job(row['id'], json.loads(row['payload']), row['attempts'] + 1, lease)
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    def _update_leased(self, job, sql, params):
+        cur = self.conn.execute(f"UPDATE jobs SET {sql} WHERE id = ? AND lease = ? AND status = ?",
+                                (*params, job.id, job.lease, LEASED))
+        return cur.rowcount == 1
+
+    def ack(self, job, result=None):
+        return self._update_leased(job, 'status = ?, lease = NULL, result = ?, error = NULL, updated_at = ?',
+                                   (DONE, json.dumps(result), time.time()))
+
+    def nack(self, job, error=None, retry=True):
+        now = time.time()
+        if not retry or job.attempts >= self.max_attempts:
+            return self._update_leased(job, 'status = ?, lease = NULL, error = ?, updated_at = ?',
+                                       (DEAD, error, now))
+        delay = self.retry_delay * 2 ** (job.attempts - 1)
+        return self._update_leased(job, 'status = ?, lease = NULL, error = ?, visible_at = ?, updated_at = ?',
+                                   (QUEUED, error, now + delay, now))
+
+    def extend(self, job, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+        now = time.time()
+        return self._update_leased(job, 'visible_at = ?, updated_at = ?', (now + visibility_timeout, now))
+
+    def dead_letters(self):
+        return [{'id': row['id'], 'payload': json.loads(row['payload']), 'attempts': row['attempts'],
+                 'error': row['error']}
+                for row in self.conn.execute('SELECT * FROM jobs WHERE status = ? ORDER BY id', (DEAD,))]
+
+    def requeue_dead(self):
+        # Gives every dead job a fresh set of attempts, e.g. after fixing what made them fail
+        now = time.time()
+        cur = self.conn.execute('UPDATE jobs SET status = ?, attempts = 0, visible_at = ?, updated_at = ? '
+                                'WHERE status = ?', (QUEUED, now, now, DEAD))
+        return cur.rowcount
+
+    def counts(self):
+        return dict(self.conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+
+
+BACKENDS = {}
+
+
+def register_backend(scheme, factory):
+    # factory(location, **options) -> JobQueue, where location is the URL without "scheme://"
+    BACKENDS[scheme] = factory
+
+
+def open_queue(url, **options):
+    # sqlite:///abs/queue.sqlite or sqlite://rel/queue.sqlite; a bare path is a SQLite queue file
+    scheme, sep, location = url.partition('://')
+    if not sep:
+        scheme, location = 'sqlite', url
+    if scheme not in BACKENDS:
+        raise ValueError(f"Unknown queue backend {scheme!r}, expected one of {sorted(BACKENDS)}")
+    return BACKENDS[scheme](location, **options)
+
+
+register_backend('sqlite', SQLiteQueue)
@@ -0,0 +1,96 @@
+import os
+import time
+import sqlite3
+
+from .source import digest
+
+# Persistent record of a batch run: one row per document, keyed by path, with the size, mtime
+# and content hash it had when it was last extracted. A file whose size and mtime are unchanged
+# is trusted without re-hashing; a touched file is re-hashed and only re-extracted if its
+# content actually changed.
+
+PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS documents (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT,
+    status TEXT NOT NULL,
+    extractor TEXT,
+    output TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    seconds REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_status ON documents (status);
+'''
+
+
+class Manifest:
+    # Only the process that owns the Manifest writes to it; workers return records instead
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        # WAL + NORMAL: each commit survives a crash of the runner without an fsync per row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, path):
+        return self.conn.execute('SELECT * FROM documents WHERE path = ?', (path,)).fetchone()
+
+    def paths(self, status):
+        return [row['path'] for row in
+                self.conn.execute('SELECT path FROM documents WHERE status = ? ORDER BY path', (status,))]
+
+    def counts(self):
+        return dict(self.conn.execute('SELECT status, COUNT(*) FROM documents GROUP BY status').fetchall())
+
+    def is_current(self, path, extractor, st=None):
+        # True when `path` was extracted by `extractor` and has not changed since
+        row = self.get(path)
+        if row is None or row['status'] != DONE or row['extractor'] != extractor:
+            return False
+        st = st or os.stat(path)
+        if (row['size'], row['mtime_ns']) == (st.st_size, st.st_mtime_ns):
+            return True
+        if row['size'] != st.st_size or digest(path) != row['sha256']:
+            return False
+        # Touched but identical: remember the new mtime so the next run skips the hash
+        with self.conn:
+            self.conn.execute('UPDATE documents SET mtime_ns = ? WHERE path = ?', (st.st_mtime_ns, path))
+        return True
+
+    def mark_running(self, path, extractor, st):
+        with self.conn:
+            self.conn.execute(
+                '''INSERT INTO documents (path, size, mtime_ns, status, extractor, attempts, updated_at)
+                   VALUES (?, ?, ?, ?, ?, 1, ?)
+                   ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns,
+                       status = excluded.status, extractor = excluded.extractor, error = NULL,
+                       attempts = attempts + 1, updated_at = excluded.updated_at''',
+                (path, st.st_size, st.st_mtime_ns, RUNNING, extractor, time.time()))
+
+    def record(self, path, ok, sha256=None, output=None, error=None, seconds=None, size=None, mtime_ns=None):
+        # size/mtime_ns are the values the worker saw when it hashed the file, so a file modified
+        # while it was being extracted is picked up again by the next --resume
+        with self.conn:
+            self.conn.execute(
+                '''UPDATE documents SET status = ?, sha256 = COALESCE(?, sha256), output = ?, error = ?,
+                       seconds = ?, size = COALESCE(?, size), mtime_ns = COALESCE(?, mtime_ns), updated_at = ?
+                   WHERE path = ?''',
+                (DONE if ok else FAILED, sha256, output, error, seconds, size, mtime_ns, time.time(), path))
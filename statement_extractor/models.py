@@ -0,0 +1,375 @@
+import io
+import re
+import sys
+import json
+import struct
+import datetime
+from array import array
+
+# Typed statement results. The extractors keep returning plain dicts with amounts as display
+# strings ("1,112.63") and dates as "MM/DD"; Statement.from_result() parses those once into
+# integer cents and proleptic Gregorian ordinals (datetime.date.toordinal), and the daily balance
+# rows live in two flat arrays instead of one dict per row. Serializers are registered by name.
+
+MONEY_RE = re.compile(r'^-?[\d,]*\d\.\d{2}$')
+DAY_RE = re.compile(r'^(\d{2})/(\d{2})$')
+PERIOD_DATE_FORMAT = '%b %d %Y'
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def amount_to_cents(amount):
+    sign = -1 if amount.startswith('-') else 1
+    whole, _, frac = amount.lstrip('-').replace(',', '').partition('.')
+    return sign * (int(whole or 0) * 100 + int((frac + '00')[:2]))
+
+
+def format_cents(cents):
+    sign = '-' if cents < 0 else ''
+    whole, frac = divmod(abs(cents), 100)
+    return f"{sign}{whole:,}.{frac:02d}"
+
+
+def parse_period(text):
+    # "Feb 01 2023-Feb 28 2023" -> (start ordinal, end ordinal); (None, None) if unparseable
+    if not text or '-' not in text:
+        return None, None
+    start, _, end = text.partition('-')
+    try:
+        return (datetime.datetime.strptime(start.strip(), PERIOD_DATE_FORMAT).toordinal(),
+                datetime.datetime.strptime(end.strip(), PERIOD_DATE_FORMAT).toordinal())
+    except ValueError:
+        return None, None
+
+
+def format_period(start, end):
+    if start is None or end is None:
+        return None
+    fmt = lambda o: datetime.date.fromordinal(o).strftime(PERIOD_DATE_FORMAT)
+    return f"{fmt(start)}-{fmt(end)}"
+
+
+def day_ordinal(text, period_end):
+    # Statement rows carry MM/DD only; the year comes from the period. A row after the period end
+    # (the 12/31 opening balance of a January statement) belongs to the year before.
+    match = DAY_RE.match(text.strip()) if text else None
+    if match is None or period_end is None:
+        return None
+    end = datetime.date.fromordinal(period_end)
+    month, day = int(match.group(1)), int(match.group(2))
+    try:
+        date = datetime.date(end.year, month, day)
+        if date > end + datetime.timedelta(days=31):
+            date = datetime.date(end.year - 1, month, day)
+    except ValueError:
+        return None
+    return date.toordinal()
+
+
+def format_day(ordinal):
+    return None if ordinal is None else datetime.date.fromordinal(ordinal).strftime('%m/%d')
+
+
+class DailyBalances:
+    # Column-backed rows: 4 bytes per date and 8 per balance instead of a dict and two strings
+    __slots__ = ('dates', 'cents')
+
+    def __init__(self, dates=None, cents=None):
+        self.dates = dates if dates is not None else array('i')
+        self.cents = cents if cents is not None else array('q')
+
+    def append(self, date, cents):
+        self.dates.append(date)
+        self.cents.append(cents)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __iter__(self):
+        return zip(self.dates, self.cents)
+
+    def __eq__(self, other):
+        return isinstance(other, DailyBalances) and self.dates == other.dates and self.cents == other.cents
+
+
+class Check:
+    __slots__ = ('date', 'amount_cents', 'description')
+
+    def __init__(self, date, amount_cents, description):
+        self.date = date
+        self.amount_cents = amount_cents
+        self.description = description
+
+    def __eq__(self, other):
+        return isinstance(other, Check) and (self.date, self.amount_cents, self.description) == \
+            (other.date, other.amount_cents, other.description)
+
+
+class Statement:
+    # Fields a method did not produce stay None. account_summary maps each key to integer cents
+    # for money values and keeps anything else ("28" days, "0.00%") as the original string.
+    __slots__ = ('customer_name', 'customer_address', 'period_start', 'period_end', 'account_summary',
+                 'daily_balances', 'checks')
+
+    def __init__(self, customer_name=None, customer_address=None, period_start=None, period_end=None,
+                 account_summary=None, daily_balances=None, checks=None):
+        self.customer_name = customer_name
+        self.customer_address = customer_address
+        self.period_start = period_start
+        self.period_end = period_end
+        self.account_summary = account_summary
+        self.daily_balances = daily_balances
+        self.checks = checks
+
+    def __eq__(self, other):
+        return isinstance(other, Statement) and all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    def __repr__(self):
+        rows = len(self.daily_balances) if self.daily_balances is not None else None
+        return f"Statement({self.customer_name!r}, {format_period(self.period_start, self.period_end)!r}, rows={rows})"
+
+    @classmethod
+    def from_result(cls, result):
+        # `result` is what extract() returns for any method. Anything that would not survive the
+        # trip to cents and ordinals (a period, row date or amount in another format) raises
+        # ValueError instead of being dropped.
+        period = result.get('statement_period')
+        start, end = parse_period(period)
+        if period and start is None:
+            raise ValueError(f"Unparseable statement_period {period!r}, "
+                             f"expected '{PERIOD_DATE_FORMAT}-{PERIOD_DATE_FORMAT}'")
+        summary = result.get('account_summary')
+        if summary is not None:
+            summary = {k: amount_to_cents(v) if isinstance(v, str) and MONEY_RE.match(v) else v
+                       for k, v in summary.items()}
+        daily = None
+        if result.get('daily_balance_summary') is not None:
+            daily = DailyBalances()
+            for row in result['daily_balance_summary']:
+                date, balance = day_ordinal(row.get('date'), end), row.get('balance')
+                if date is None or not balance or not MONEY_RE.match(balance):
+                    raise ValueError(f"Unparseable daily balance row {row!r} (statement_period {period!r})")
+                daily.append(date, amount_to_cents(balance))
+        checks = None
+        if result.get('checks') is not None:
+            checks = []
+            for c in result['checks']:
+                date = day_ordinal(c.get('date'), end)
+                amount = c.get('amount')
+                if (c.get('date') and date is None) or (amount and not MONEY_RE.match(amount)):
+                    raise ValueError(f"Unparseable check {c!r} (statement_period {period!r})")
+                checks.append(Check(date, amount_to_cents(amount) if amount else None, c.get('description')))
+        return cls(result.get('customer_name'), result.get('customer_address'), start, end, summary, daily, checks)
+
+    def to_result(self):
+        # Back to the extractors' dict shape, with display strings
+        result = {
+            'customer_name': self.customer_name,
+            'customer_address': self.customer_address,
+            'statement_period': format_period(self.period_start, self.period_end),
+        }
+        if self.account_summary is not None:
+            result['account_summary'] = {k: format_cents(v) if isinstance(v, int) else v
+                                         for k, v in self.account_summary.items()}
+        if self.daily_balances is not None:
+            result['daily_balance_summary'] = [{'date': format_day(d), 'balance': format_cents(c)}
+                                               for d, c in self.daily_balances]
+        if self.checks is not None:
+            result['checks'] = [{'date': format_day(c.date),
+                                 'amount': None if c.amount_cents is None else format_cents(c.amount_cents),
+                                 'description': c.description} for c in self.checks]
+        return result
+
+    def header(self):
+        # Everything except the daily balance columns, as JSON-ready values
+        return {
+            'customer_name': self.customer_name,
+            'customer_address': self.customer_address,
+            'period_start': self.period_start,
+            'period_end': self.period_end,
+            'account_summary': self.account_summary,
+            'checks': None if self.checks is None else [[c.date, c.amount_cents, c.description] for c in self.checks],
+        }
+
+    @classmethod
+    def from_header(cls, header, daily_balances=None):
+        checks = header.get('checks')
+        if checks is not None:
+            checks = [Check(*c) for c in checks]
+        return cls(header.get('customer_name'), header.get('customer_address'), header.get('period_start'),
+                   header.get('period_end'), header.get('account_summary'), daily_balances, checks)
+
+
+# Serializers: dump(statements, fp) writes an iterable of Statements, load(fp) yields them back.
+
+SERIALIZERS = {}
+
+
+def register_serializer(name, dump, load, binary=True):
+    SERIALIZERS[name] = (dump, load, binary)
+
+
+def get_serializer(name):
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown format {name!r}, expected one of {sorted(SERIALIZERS)}")
+    return SERIALIZERS[name]
+
+
+def dump(statements, fp, format='jsonl'):
+    return get_serializer(format)[0](statements, fp)
+
+
+def load(fp, format='jsonl'):
+    return get_serializer(format)[1](fp)
+
+
+def dump_jsonl(statements, fp):
+    # One compact line per statement; daily balances as two parallel integer lists
+    for statement in statements:
+        record = statement.header()
+        if statement.daily_balances is not None:
+            record['daily_dates'] = statement.daily_balances.dates.tolist()
+            record['daily_cents'] = statement.daily_balances.cents.tolist()
+        fp.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+
+def load_jsonl(fp):
+    for line in fp:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        daily = None
+        if 'daily_dates' in record:
+            daily = DailyBalances(array('i', record['daily_dates']), array('q', record['daily_cents']))
+        yield Statement.from_header(record, daily)
+
+
+BINARY_MAGIC = b'STM1'
+# Per record: header length, row count (-1 when the field is absent)
+RECORD = struct.Struct('<Ii')
+
+
+def _little_endian(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def dump_binary(statements, fp):
+    # Length-prefixed records: a compact JSON header, then the dates (int32) and cents (int64)
+    # arrays copied out in one piece each, little-endian
+    fp.write(BINARY_MAGIC)
+    for statement in statements:
+        header = json.dumps(statement.header(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        daily = statement.daily_balances
+        fp.write(RECORD.pack(len(header), -1 if daily is None else len(daily)))
+        fp.write(header)
+        if daily is not None:
+            fp.write(_little_endian(daily.dates).tobytes())
+            fp.write(_little_endian(daily.cents).tobytes())
+
+
+def load_binary(fp):
+    if fp.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise ValueError('not a binary statement file')
+    while True:
+        prefix = fp.read(RECORD.size)
+        if not prefix:
+            return
+        header_len, rows = RECORD.unpack(prefix)
+        header = json.loads(fp.read(header_len).decode('utf-8'))
+        daily = None
+        if rows >= 0:
+            dates, cents = array('i'), array('q')
+            dates.frombytes(fp.read(rows * dates.itemsize))
+            cents.frombytes(fp.read(rows * cents.itemsize))
+            daily = DailyBalances(_little_endian(dates), _little_endian(cents))
+        yield Statement.from_header(header, daily)
+
+
+def to_arrow(statements):
+    # One row per statement. Daily balances are list<date32>/list<int64> columns built from flat
+    # value arrays plus offsets, so millions of rows never become Python objects.
+    import numpy as np
+    import pyarrow as pa
+    headers, offsets, dates, cents, present = [], array('i', [0]), array('i'), array('q'), []
+    for statement in statements:
+        headers.append(statement.header())
+        daily = statement.daily_balances
+        present.append(daily is not None)
+        if daily is not None:
+            dates.extend(daily.dates)
+            cents.extend(daily.cents)
+        offsets.append(len(dates))
+    mask = pa.array([not p for p in present])
+    day_values = pa.array(np.frombuffer(dates, dtype=np.int32) - np.int32(EPOCH_ORDINAL)).cast(pa.date32())
+    return pa.table({
+        'customer_name': pa.array([h['customer_name'] for h in headers], type=pa.string()),
+        'customer_address': pa.array([h['customer_address'] for h in headers], type=pa.list_(pa.string())),
+        'period_start': pa.array([None if h['period_start'] is None else h['period_start'] - EPOCH_ORDINAL
+                                  for h in headers], type=pa.int32()).cast(pa.date32()),
+        'period_end': pa.array([None if h['period_end'] is None else h['period_end'] - EPOCH_ORDINAL
+                                for h in headers], type=pa.int32()).cast(pa.date32()),
+        'account_summary': pa.array([None if h['account_summary'] is None else
+                                     json.dumps(h['account_summary'], separators=(',', ':')) for h in headers]),
+        'checks': pa.array([None if h['checks'] is None else json.dumps(h['checks'], separators=(',', ':'))
+                            for h in headers], type=pa.string()),
+        'daily_dates': pa.ListArray.from_arrays(pa.array(offsets, type=pa.int32()), day_values, mask=mask),
+        'daily_cents': pa.ListArray.from_arrays(pa.array(offsets, type=pa.int32()),
+                                                pa.array(np.frombuffer(cents, dtype=np.int64)), mask=mask),
+    })
+
+
+def from_arrow(table):
+    import numpy as np
+    import pyarrow as pa
+    epoch = lambda v: None if v is None else v + EPOCH_ORDINAL
+    as_days = lambda column: column.cast(pa.int32()) if pa.types.is_date32(column.type) else column
+    columns = {name: table.column(name).combine_chunks() for name in table.column_names}
+    starts = as_days(columns['period_start']).to_pylist()
+    ends = as_days(columns['period_end']).to_pylist()
+    names, addresses = columns['customer_name'].to_pylist(), columns['customer_address'].to_pylist()
+    summaries, checks = columns['account_summary'].to_pylist(), columns['checks'].to_pylist()
+    date_lists, cent_lists = columns['daily_dates'], columns['daily_cents']
+    offsets = date_lists.offsets.to_pylist()
+    flat_dates, flat_cents = array('i'), array('q')
+    days = date_lists.values.cast(pa.int32()).to_numpy(zero_copy_only=False)
+    flat_dates.frombytes((days + np.int32(EPOCH_ORDINAL)).astype(np.int32).tobytes())
+    flat_cents.frombytes(cent_lists.values.to_numpy(zero_copy_only=False).astype(np.int64).tobytes())
+    for i in range(len(table)):
+        daily = None
+        if date_lists[i].is_valid:
+            lo, hi = offsets[i], offsets[i + 1]
+            daily = DailyBalances(flat_dates[lo:hi], flat_cents[lo:hi])
+        header = {'customer_name': names[i], 'customer_address': addresses[i],
+                  'period_start': epoch(starts[i]), 'period_end': epoch(ends[i]),
+                  'account_summary': None if summaries[i] is None else json.loads(summaries[i]),
+                  'checks': None if checks[i] is None else json.loads(checks[i])}
+        yield Statement.from_header(header, daily)
+
+
+def dump_columnar(statements, fp):
+    # Parquet (requires pyarrow)
+    import pyarrow.parquet as pq
+    pq.write_table(to_arrow(statements), fp)
+
+
+def load_columnar(fp):
+    import pyarrow.parquet as pq
+    return from_arrow(pq.read_table(fp))
+
+
+register_serializer('jsonl', dump_jsonl, load_jsonl, binary=False)
+register_serializer('binary', dump_binary, load_binary)
+register_serializer('columnar', dump_columnar, load_columnar)
+
+
+def dumps(statements, format='jsonl'):
+    binary = get_serializer(format)[2]
+    buf = io.BytesIO() if binary else io.StringIO()
+    dump(statements, buf, format)
+    return buf.getvalue()
+
+
+def loads(data, format='jsonl'):
+    return list(load(io.BytesIO(data) if isinstance(data, bytes) else io.StringIO(data), format))
@@ -0,0 +1,73 @@
+import os
+from collections import deque
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# Process-pool map that survives dead workers. A worker that dies (killed by the OOM killer, a
+# crash in a native library) breaks the whole ProcessPoolExecutor and fails every job in flight,
+# not just its own. The pool is then recreated and the jobs that were in flight are rerun one at
+# a time: a job that breaks the pool while running alone is the one that kills its worker, and it
+# is the only one reported failed.
+
+
+def imap_unordered(fn, items, workers=None, window=None):
+    # Yields (item, result, error) for fn(*item) in completion order, with error the exception
+    # (and result None) when fn raised or its worker died. At most `window` items (default two
+    # per worker) are in flight, and `items` is read lazily: the next one is only taken when it
+    # can be handed to a worker.
+    workers = workers or os.cpu_count() or 1
+    window = window or workers * 2
+    items = iter(items)
+    queued = deque()  # taken from items but not handed to a worker yet
+    suspects = deque()  # in flight when a worker died
+    alone = None  # the suspect running on its own
+    futures = {}
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while True:
+            broken = False
+            try:
+                if suspects:
+                    if not futures:
+                        alone = suspects[0]
+                        futures[executor.submit(fn, *alone)] = alone
+                        suspects.popleft()
+                else:
+                    while len(futures) < window:
+                        if not queued:
+                            item = next(items, None)
+                            if item is None:
+                                break
+                            queued.append(item)
+                        futures[executor.submit(fn, *queued[0])] = queued[0]
+                        queued.popleft()
+            except BrokenProcessPool:
+                broken = True
+            if not futures and not broken:
+                return
+            while True:
+                # Once the pool is broken every job still in flight fails with it, so wait for all of them
+                done, _ = wait(futures, return_when=ALL_COMPLETED if broken else FIRST_COMPLETED)
+                for future in done:
+                    item = futures.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        broken = True
+                        if item is alone:
+                            yield item, None, e
+                        else:
+                            suspects.append(item)
+                        continue
+                    except Exception as e:
+                        yield item, None, e
+                        continue
+                    yield item, result, None
+                if not broken or not futures:
+                    break
+            if broken:
+                alone = None
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(max_workers=workers)
+    finally:
+        executor.shutdown(cancel_futures=True)
@@ -0,0 +1,71 @@
+import io
+import os
+import glob
+import mmap
+import hashlib
+from contextlib import contextmanager
+
+# Every extractor accepts a PDF as a filesystem path, bytes/bytearray/memoryview, or a binary
+# file-like object. File-like input is turned into a buffer once at the entry point so the
+# cache hash and the PDF library can both read it without a temp file.
+
+# Local files at least this large are memory-mapped instead of read through buffered I/O
+MMAP_MIN_BYTES = 4 * 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+
+def iter_pdf_paths(source):
+    # A directory is scanned recursively for *.pdf, anything else is treated as a glob pattern
+    if os.path.isdir(source):
+        pattern = os.path.join(source, '**', '*.pdf')
+    else:
+        pattern = source
+    return sorted(p for p in glob.iglob(pattern, recursive=True) if os.path.isfile(p))
+
+
+def normalize(source):
+    # Paths and bytes-like objects pass through; file-like objects are read into a buffer
+    if is_path(source) or isinstance(source, (bytes, bytearray, memoryview)):
+        return source
+    if hasattr(source, 'getbuffer'):
+        return source.getbuffer()
+    if hasattr(source, 'read'):
+        return source.read()
+    raise TypeError(f"Expected a path, bytes-like or file-like PDF source, got {type(source).__name__}")
+
+
+def source_name(source):
+    return os.fspath(source) if is_path(source) else f"<{len(memoryview(source))} bytes>"
+
+
+@contextmanager
+def open_stream(source):
+    # Binary stream over `source` for libraries that parse from a file object (pdfplumber, docling)
+    if not is_path(source):
+        yield io.BytesIO(source)
+        return
+    with open(source, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < MMAP_MIN_BYTES:
+            yield f
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def digest(source):
+    if not is_path(source):
+        return hashlib.sha256(source).hexdigest()
+    with open(source, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_MIN_BYTES:
+            # hashlib reads the mapping directly, without copying the file into Python bytes
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return hashlib.sha256(mapped).hexdigest()
+        h = hashlib.sha256()
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            h.update(chunk)
+        return h.hexdigest()
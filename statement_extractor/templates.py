@@ -0,0 +1,147 @@
+import re
+
+# Declarative bank layouts. Every parser reads its labels and section headers from a Template
+# instead of module constants, and the template for a statement is picked from page 1 by
+# identify(): one scan of the page text with a single regex that combines the fingerprint
+# phrases of every registered template. Adding a bank adds alternatives to that regex, not
+# another pass over the lines.
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def squash(text):
+    # Labels are compared with whitespace removed: pdfplumber drops the narrow gaps between
+    # label words ("StatementPeriod:") that PyMuPDF and OCR keep ("Statement Period:")
+    return WHITESPACE_RE.sub('', text)
+
+
+class Template:
+    def __init__(self, name, fingerprint, name_anchor, period_label, header_labels, summary_header,
+                 summary_keys, activity_header, activity_sections, balance_header, section_headers=(),
+                 countries=(), product_names=(), footer_prefix='Call ', check_label='CHECK DEPOSIT',
+                 check_pair_label='ATM CHECK DEPOSIT', posting_date_label='POSTING DATE'):
+        self.name = name
+        self.fingerprint = tuple(fingerprint)
+        self.name_anchor = name_anchor
+        self.period_label = period_label
+        self.header_labels = tuple(header_labels)
+        self.summary_header = summary_header
+        self.summary_keys = list(summary_keys)
+        self.activity_header = activity_header
+        self.activity_sections = tuple(activity_sections)
+        self.balance_header = balance_header
+        # Column header that starts the rows of each activity section
+        self.posting_date_label = posting_date_label
+        self.section_headers = list(section_headers)
+        self.countries = tuple(countries)
+        self.product_names = tuple(product_names)
+        self.footer_prefix = footer_prefix
+        self.check_label = check_label
+        # docling's line pairing only gives a date to these deposit lines (a narrower match than
+        # check_label, which other CHECK DEPOSIT lines in the same column would also hit)
+        self.check_pair_label = check_pair_label
+
+        # Derived forms, computed once per template
+        self.squashed_labels = [squash(label) for label in self.header_labels]
+        self.label_values = tuple(f"{label}:" for label in self.header_labels if label != period_label)
+        self.summary_mark = squash(summary_header).upper()
+        self.activity_mark = squash(activity_header).upper()
+        self.balance_mark = squash(balance_header).upper()
+        self.posting_date_mark = squash(posting_date_label).upper()
+        self.activity_section_names = {squash(s).upper(): s for s in self.activity_sections}
+        self.section_header_set = {h.upper() for h in self.section_headers}
+        self.period_re = re.compile(re.escape(period_label + ':') + r' ([^\n]+)')
+        self.squashed_period_re = re.compile(re.escape(squash(period_label) + ':') + r' ([^\n]+)')
+        self.check_re = re.compile(r'(\d{2}/\d{2}) .*' + re.escape(check_label) + r'.* ([0-9,.]+)')
+
+    def __repr__(self):
+        return f"Template({self.name!r})"
+
+
+class Registry:
+    def __init__(self):
+        self.templates = {}
+        self.default = None
+        self._pattern = None
+        self._owners = {}
+
+    def register(self, template, default=False):
+        self.templates[template.name] = template
+        if default or self.default is None:
+            self.default = template
+        self._pattern = None
+        return template
+
+    def get(self, template):
+        # Accepts a Template, a registered name, or None for the default
+        if template is None:
+            return self.default
+        if isinstance(template, Template):
+            return template
+        if template not in self.templates:
+            raise ValueError(f"Unknown template {template!r}, expected one of {sorted(self.templates)}")
+        return self.templates[template]
+
+    def _compile(self):
+        owners = {}
+        for template in self.templates.values():
+            for phrase in template.fingerprint:
+                owners.setdefault(squash(phrase).upper(), []).append(template.name)
+        # Longest first, so a phrase that contains another one wins at the same position
+        alternatives = sorted(owners, key=len, reverse=True)
+        self._pattern = re.compile('|'.join(map(re.escape, alternatives)))
+        self._owners = owners
+
+    def identify(self, page_text):
+        # Scores every template by the share of its fingerprint phrases found on page 1 and
+        # returns the best one (the default when nothing matches)
+        if self._pattern is None:
+            self._compile()
+        if not isinstance(page_text, str):
+            page_text = '\n'.join(page_text)
+        found = set(self._pattern.findall(squash(page_text).upper()))
+        scores = {}
+        for phrase in found:
+            for name in self._owners[phrase]:
+                scores[name] = scores.get(name, 0) + 1
+        if not scores:
+            return self.default
+        best = max(scores, key=lambda name: scores[name] / len(self.templates[name].fingerprint))
+        return self.templates[best]
+
+
+TD_BANK = Template(
+    name='td_bank',
+    fingerprint=['STATEMENT OF ACCOUNT', 'Cust Ref #:', 'Primary Account #:', 'Bank-by-Phone',
+                 'ACCOUNT SUMMARY', 'DAILY ACCOUNT ACTIVITY', 'Average Collected Balance'],
+    name_anchor='Page:',
+    period_label='Statement Period',
+    header_labels=['Statement Period', 'Cust Ref #', 'Primary Account #'],
+    summary_header='ACCOUNT SUMMARY',
+    summary_keys=[
+        'Beginning Balance', 'Average Collected Balance', 'Electronic Deposits',
+        'Interest Earned This Period', 'Interest Paid Year-to-Date', 'Electronic Payments',
+        'Annual Percentage Yield Earned', 'Service Charges', 'Days in Period', 'Ending Balance'
+    ],
+    activity_header='DAILY ACCOUNT ACTIVITY',
+    activity_sections=['Electronic Deposits', 'Electronic Payments', 'Service Charges', 'Deposits',
+                       'Checks Paid', 'Other Credits', 'Other Withdrawals'],
+    balance_header='DAILY BALANCE SUMMARY',
+    posting_date_label='POSTING DATE',
+    section_headers=['ACCOUNT SUMMARY', 'DAILY ACCOUNT ACTIVITY', 'STATEMENT OF ACCOUNT', 'Electronic Deposits',
+                     'Electronic Payments', 'Service Charges', 'DAILY BALANCE SUMMARY'],
+    countries=['KAZAKHSTAN', 'USA', 'INDIA'],
+    product_names=['TD Business Convenience Plus'],
+)
+
+REGISTRY = Registry()
+REGISTRY.register(TD_BANK, default=True)
+
+register = REGISTRY.register
+get_template = REGISTRY.get
+identify = REGISTRY.identify
+
+
+def cache_version(version, template):
+    # Auto-identified templates follow from the content hash; an explicit override does not
+    return version if template is None else f"{version}-{get_template(template).name}"
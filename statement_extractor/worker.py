@@ -0,0 +1,226 @@
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+import multiprocessing
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from statement_extractor.api import METHODS
+from statement_extractor.batch import _run_one, extractor_id
+from statement_extractor.cache import ResultCache
+from statement_extractor.jobqueue import (DEFAULT_MAX_ATTEMPTS, DEFAULT_RETRY_DELAY, DEFAULT_VISIBILITY_TIMEOUT,
+                                         open_queue)
+from statement_extractor.source import iter_pdf_paths
+from statement_extractor import fields as field_pages
+from statement_extractor import templates
+
+# Queue-fed extraction for several worker processes or machines sharing one queue:
+#
+#   enqueue SOURCE        add one job {"pdf", "method", "fields", "template"} per PDF under SOURCE
+#   work                  lease jobs, extract them and write results/<sha[:2]>/<sha>.<extractor>.json
+#   status                job counts per status and the dead letters
+#   requeue-dead          give the dead letters a fresh set of attempts
+#
+# Results are written before the job is acked, to a file named by content hash and extractor, so a
+# job that is delivered twice (its worker died after writing) just rewrites the same file.
+
+DEFAULT_QUEUE = 'jobs.sqlite'
+DEFAULT_POLL_INTERVAL = 1.0
+# Longest a job may hold its lease; past it the heartbeat stops and the job is redelivered
+DEFAULT_JOB_TIMEOUT = 3600.0
+
+
+def make_payload(pdf_path, method='auto', fields=None, template=None):
+    # Absolute paths: workers may run from another directory (or another machine with the same mount)
+    return {'pdf': os.path.abspath(pdf_path), 'method': method, 'fields': fields, 'template': template}
+
+
+def enqueue(queue_url, source, method='auto', fields=None, template=None):
+    payloads = [make_payload(pdf_path, method, fields, template) for pdf_path in iter_pdf_paths(source)]
+    with open_queue(queue_url) as queue:
+        queue.put_many(payloads)
+    return len(payloads)
+
+
+class Heartbeat:
+    # Extends the lease every third of the visibility timeout while a job runs, but only until
+    # job_timeout: a job that hangs past it lets its lease expire, so it is redelivered (and
+    # dead-lettered once out of attempts) like the job of a worker that died. Uses its own
+    # connection: the worker's stays on its thread.
+
+    def __init__(self, queue_url, job, visibility_timeout, options, job_timeout=DEFAULT_JOB_TIMEOUT):
+        self.queue_url = queue_url
+        self.job = job
+        self.visibility_timeout = visibility_timeout
+        self.options = options
+        self.deadline = time.monotonic() + job_timeout
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        with open_queue(self.queue_url, **self.options) as queue:
+            while not self.stopped.wait(self.visibility_timeout / 3):
+                # The last extension never reaches past the deadline
+                remaining = self.deadline - time.monotonic()
+                if remaining <= 0 or not queue.extend(self.job, min(self.visibility_timeout, remaining)):
+                    return
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+
+def process(job, output_dir, cache):
+    # Returns (record, retry); retry is False for payloads that can never succeed
+    payload = job.payload
+    try:
+        pdf_path, method = payload['pdf'], payload.get('method', 'auto')
+        fields = field_pages.check_fields(payload.get('fields'), tuple(field_pages.FIELD_PAGES))
+        template = payload.get('template')
+        extractor = extractor_id(method, fields, template)
+    except (KeyError, ValueError, ImportError) as e:
+        # A backend missing on this machine may be installed on another worker
+        retry = isinstance(e, ImportError)
+        return {'file': payload.get('pdf'), 'ok': False, 'error': f"{type(e).__name__}: {e}"}, retry
+    return _run_one(pdf_path, method, extractor, output_dir, cache, fields, template), True
+
+
+def run_worker(queue_url, output_dir, cache=None, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT,
+               max_attempts=DEFAULT_MAX_ATTEMPTS, retry_delay=DEFAULT_RETRY_DELAY, poll_interval=DEFAULT_POLL_INTERVAL,
+               drain=False, max_jobs=None, progress=None, job_timeout=DEFAULT_JOB_TIMEOUT):
+    # Runs until stopped (SIGTERM/SIGINT finish the current job first), until the queue is empty
+    # with drain=True, or after max_jobs jobs. Returns (ok, failed). A job still running after
+    # job_timeout loses its lease; if it does finish, its ack or nack reports the lease lost.
+    stopping = threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: stopping.set())
+    options = {'max_attempts': max_attempts, 'retry_delay': retry_delay}
+    ok = failed = 0
+    with open_queue(queue_url, **options) as queue:
+        while not stopping.is_set() and (max_jobs is None or ok + failed < max_jobs):
+            job = queue.get(visibility_timeout)
+            if job is None:
+                if drain:
+                    break
+                stopping.wait(poll_interval)
+                continue
+            with Heartbeat(queue_url, job, visibility_timeout, options, job_timeout):
+                record, retry = process(job, output_dir, cache)
+            if record['ok']:
+                acked = queue.ack(job, {'output': record['output'], 'sha256': record['sha256'],
+                                        'seconds': record['seconds']})
+                ok += 1
+            else:
+                acked = queue.nack(job, record['error'], retry=retry)
+                failed += 1
+            record.update(job=job.id, attempt=job.attempts, acked=acked)
+            if progress is not None:
+                progress(record)
+    return ok, failed
+
+
+def _worker_process(queue_url, output_dir, no_cache, visibility_timeout, max_attempts, retry_delay, poll_interval,
+                    drain, max_jobs, job_timeout):
+    # Entry point of each worker process: caches and queue connections are never shared across a fork
+    cache = None if no_cache else ResultCache.from_env()
+
+    def progress(record):
+        status = 'ok' if record['ok'] else record['error']
+        lost = '' if record['acked'] else ' (lease lost, job may run again)'
+        print(f"[worker {os.getpid()}] job {record['job']} attempt {record['attempt']} {record['file']}: "
+              f"{status}{lost}", file=sys.stderr)
+
+    ok, failed = run_worker(queue_url, output_dir, cache=cache, visibility_timeout=visibility_timeout,
+                            max_attempts=max_attempts, retry_delay=retry_delay, poll_interval=poll_interval,
+                            drain=drain, max_jobs=max_jobs, progress=progress, job_timeout=job_timeout)
+    print(f"[worker {os.getpid()}] {ok + failed} jobs processed ({ok} ok, {failed} failed).")
+
+
+def work(args):
+    worker_args = (args.queue, args.output_dir, args.no_cache, args.visibility_timeout, args.max_attempts,
+                   args.retry_delay, args.poll_interval, args.drain, args.max_jobs, args.job_timeout)
+    if args.processes == 1:
+        _worker_process(*worker_args)
+        return 0
+    workers = [multiprocessing.Process(target=_worker_process, args=worker_args) for _ in range(args.processes)]
+    for worker in workers:
+        worker.start()
+
+    def forward(sig, _):
+        for worker in workers:
+            if worker.is_alive():
+                os.kill(worker.pid, sig)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for worker in workers:
+        worker.join()
+    return 0 if all(worker.exitcode == 0 for worker in workers) else 1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Distribute statement extraction over workers through a job queue.')
+    parser.add_argument('--queue', default=os.environ.get('PDF_EXTRACT_QUEUE', DEFAULT_QUEUE),
+                        help='queue URL, e.g. sqlite:///var/lib/extract/jobs.sqlite (default: $PDF_EXTRACT_QUEUE '
+                             f'or {DEFAULT_QUEUE})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    en = commands.add_parser('enqueue', help='add one job per PDF')
+    en.add_argument('source', help='directory (searched recursively) or glob of statement PDFs')
+    en.add_argument('--method', default='auto', choices=['auto'] + sorted(METHODS))
+    en.add_argument('--template', choices=sorted(templates.REGISTRY.templates), default=None)
+    field_pages.add_arguments(en, tuple(field_pages.FIELD_PAGES))
+
+    wk = commands.add_parser('work', help='process jobs until stopped')
+    wk.add_argument('--output-dir', default='batch_results',
+                    help='directory the per-document JSON results are written to')
+    wk.add_argument('--processes', type=int, default=1, help='worker processes on this machine')
+    wk.add_argument('--visibility-timeout', type=float, default=DEFAULT_VISIBILITY_TIMEOUT,
+                    help='seconds a leased job stays invisible to other workers without a heartbeat')
+    wk.add_argument('--job-timeout', type=float, default=DEFAULT_JOB_TIMEOUT,
+                    help='seconds a job may keep its lease through heartbeats before it is redelivered')
+    wk.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+                    help='deliveries before a failing job is dead-lettered')
+    wk.add_argument('--retry-delay', type=float, default=DEFAULT_RETRY_DELAY,
+                    help='seconds before a failed job is retried, doubled on every attempt')
+    wk.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                    help='seconds to wait before polling an empty queue again')
+    wk.add_argument('--drain', action='store_true', help='exit once the queue has no visible jobs')
+    wk.add_argument('--max-jobs', type=int, default=None, help='exit after this many jobs (per process)')
+    wk.add_argument('--no-cache', action='store_true',
+                    help='always re-extract instead of reusing results cached by content hash')
+
+    commands.add_parser('status', help='job counts and dead letters')
+    commands.add_parser('requeue-dead', help='retry every dead-lettered job')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'enqueue':
+        n = enqueue(args.queue, args.source, method=args.method, fields=args.fields, template=args.template)
+        print(f"[queue] {n} jobs enqueued to {args.queue}.")
+        return 0
+    if args.command == 'work':
+        return work(args)
+    with open_queue(args.queue) as queue:
+        if args.command == 'requeue-dead':
+            print(f"[queue] {queue.requeue_dead()} dead jobs requeued.")
+            return 0
+        print(json.dumps({'counts': queue.counts(), 'dead': queue.dead_letters()}, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
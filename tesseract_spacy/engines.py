@@ -0,0 +1,93 @@
+from abc import ABC, abstractmethod
+
+# OCR backends behind iter_ocr_pages. An engine turns a batch of page images (NumPy arrays, as
+# rasterized, never re-encoded) into one text per image with one line per text row. Engines are
+# created on first use and kept for the life of the process, so a worker loads its models once.
+
+_INSTANCES = {}
+
+
+class OCREngine(ABC):
+    name = None
+    # Pages handed to recognize() at a time
+    batch_size = 1
+    # Worker processes when the caller does not choose; None means one per CPU
+    default_workers = None
+
+    @abstractmethod
+    def recognize(self, images):
+        # One text per image (NumPy arrays, in order), with one line per text row
+        ...
+
+
+class TesseractEngine(OCREngine):
+    # One tesseract subprocess per page (pytesseract)
+    name = 'tesseract'
+
+    def __init__(self):
+        import pytesseract
+        self.pytesseract = pytesseract
+
+    def recognize(self, images):
+        return [self.pytesseract.image_to_string(image) for image in images]
+
+
+class EasyOCREngine(OCREngine):
+    # One EasyOCR reader (detector + recognizer) per process, on CPU. Pages of the same size go
+    # through a single readtext_batched call; the model already uses every core, so one worker.
+    name = 'easyocr'
+    batch_size = 8
+    default_workers = 1
+    languages = ('en',)
+
+    def __init__(self):
+        import easyocr
+        self.reader = easyocr.Reader(list(self.languages), gpu=False, verbose=False)
+
+    def recognize(self, images):
+        texts = [None] * len(images)
+        by_shape = {}
+        for i, image in enumerate(images):
+            by_shape.setdefault(image.shape, []).append(i)
+        for indices in by_shape.values():
+            results = self.reader.readtext_batched([images[i] for i in indices], detail=1, paragraph=False)
+            for i, boxes in zip(indices, results):
+                texts[i] = boxes_to_text(boxes)
+        return texts
+
+
+def boxes_to_text(boxes):
+    # EasyOCR returns (corner points, text, confidence) per word group. Boxes whose vertical
+    # centres are within half a box height of each other form a row, read left to right.
+    items = []
+    for points, text, _ in boxes:
+        ys = [p[1] for p in points]
+        items.append((min(p[0] for p in points), (min(ys) + max(ys)) / 2, max(ys) - min(ys), text))
+    items.sort(key=lambda item: item[1])
+    rows = []
+    for item in items:
+        if rows and abs(item[1] - rows[-1][0]) <= max(item[2], rows[-1][1]) / 2:
+            rows[-1][2].append(item)
+        else:
+            rows.append([item[1], item[2], [item]])
+    return '\n'.join(' '.join(item[3] for item in sorted(row[2])) for row in rows)
+
+
+ENGINES = {}
+
+
+def register_engine(cls):
+    ENGINES[cls.name] = cls
+    return cls
+
+
+def get_engine(name):
+    if name not in ENGINES:
+        raise ValueError(f"Unknown OCR engine {name!r}, expected one of {sorted(ENGINES)}")
+    if name not in _INSTANCES:
+        _INSTANCES[name] = ENGINES[name]()
+    return _INSTANCES[name]
+
+
+register_engine(TesseractEngine)
+register_engine(EasyOCREngine)
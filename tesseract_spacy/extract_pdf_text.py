@@ -1,68 +1,116 @@
 import os
-from pdf2image import convert_from_path
-import pytesseract
+import sys
+from pdf2image import convert_from_path, convert_from_bytes, pdfinfo_from_path, pdfinfo_from_bytes
+import numpy as np
 import re
 import json
 import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+from statement_extractor.cache import ResultCache, cached_extract
+from tesseract_spacy.preprocess import prepare
+from tesseract_spacy.engines import ENGINES, get_engine
+from statement_extractor.source import is_path
+from statement_extractor import fields as field_pages
+from statement_extractor import templates
+from statement_extractor.templates import TD_BANK
+from statement_extractor import instrument
+from statement_extractor.instrument import span, count, add_span
 
 # Paths
 PDF_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'tdbank.pdf')
 
+EXTRACTOR_NAME = 'tesseract_spacy'
+EXTRACTOR_VERSION = '1'
+
+# OCR settings
+DEFAULT_DPI = 200
+DEFAULT_ENGINE = 'tesseract'
+# Adaptive mode: every page is OCR'd at the first resolution, pages that fail validation are
+# retried at the next one
+ADAPTIVE_DPIS = (150, 300)
+# The header and ACCOUNT SUMMARY sit in the top half of page 1
+HEADER_CROP = 0.5
+FIELDS = ('customer_name', 'customer_address', 'statement_period', 'account_summary', 'checks')
+# An ACCOUNT SUMMARY read with fewer label/value pairs than this is treated as a misread
+MIN_SUMMARY_ENTRIES = 4
+
 # Helper functions for extraction
 
+WHITESPACE_RE = re.compile(r'\s+')
+PERIOD_RE = TD_BANK.period_re
+SUMMARY_SPLIT_RE = re.compile(r'(?<=[0-9]) (?=[A-Za-z])| (?=[A-Z][a-z])')
+SUMMARY_PAIR_RE = re.compile(r'([A-Za-z]+[A-Za-z ]*[A-Za-z]+) ([0-9,.%-]+)')
+CHECK_RE = TD_BANK.check_re
+PERIOD_VALUE_RE = re.compile(r'[A-Za-z]{3,9} \d{1,2},? \d{4} ?- ?[A-Za-z]{3,9} \d{1,2},? \d{4}')
+SUMMARY_VALUE_RE = re.compile(r'-?[0-9][0-9,]*(\.\d{2}%?)?')
+
 def normalize(s):
-    return re.sub(r'\s+', '', s).lower()
+    return WHITESPACE_RE.sub('', s).lower()
+
+SUMMARY_MARK = normalize(TD_BANK.summary_header)
+ACTIVITY_MARK = normalize(TD_BANK.activity_header)
 
-def extract_customer_info(lines):
+def extract_customer_info(lines, template=TD_BANK):
     name = None
     address = []
+    labels = template.header_labels
     for i, line in enumerate(lines):
-        if 'Page:' in line:
-            name = line.split('Page:')[0].strip()
+        if template.name_anchor in line:
+            name = line.split(template.name_anchor)[0].strip()
             for l in lines[i+1:]:
                 l = l.strip()
                 if not l: break
-                if any(kw in l for kw in ["Statement Period", "Cust Ref #", "Primary Account #"]):
-                    l = l.split("Statement Period")[0].split("Cust Ref #")[0].split("Primary Account #")[0].strip()
+                if any(kw in l for kw in labels):
+                    for kw in labels:
+                        l = l.split(kw)[0]
+                    l = l.strip()
                 if not l: break
                 address.append(l)
             break
     return name, address
 
-def extract_statement_period(lines):
+def extract_statement_period(lines, template=TD_BANK):
     for line in lines:
-        m = re.search(r'Statement Period: ([^\n]+)', line)
+        m = template.period_re.search(line)
         if m:
             return m.group(1).strip()
     return None
 
-def extract_account_summary(lines):
+def extract_account_summary(lines, template=TD_BANK):
     summary = {}
     in_summary = False
+    summary_mark, activity_mark = normalize(template.summary_header), normalize(template.activity_header)
     for line in lines:
-        if normalize('ACCOUNT SUMMARY') in normalize(line):
+        norm = normalize(line)
+        if summary_mark in norm:
             in_summary = True
             continue
         if in_summary:
-            if normalize('DAILY ACCOUNT ACTIVITY') in normalize(line):
+            if activity_mark in norm:
                 break
-            parts = re.split(r'(?<=[0-9]) (?=[A-Za-z])| (?=[A-Z][a-z])', line)
+            parts = SUMMARY_SPLIT_RE.split(line)
             for part in parts:
-                m = re.match(r'([A-Za-z]+[A-Za-z ]*[A-Za-z]+) ([0-9,.%-]+)', part.strip())
+                m = SUMMARY_PAIR_RE.match(part.strip())
                 if m:
                     key = m.group(1).replace(' ', '')
                     value = m.group(2)
                     summary[key] = value
     return summary
 
-def extract_checks(lines):
+def extract_checks(lines, template=TD_BANK):
     checks = []
     in_activity = False
+    activity_mark = normalize(template.activity_header)
     for line in lines:
-        if normalize('DAILY ACCOUNT ACTIVITY') in normalize(line):
+        if not in_activity and activity_mark in normalize(line):
             in_activity = True
-        if in_activity and ('CHECK DEPOSIT' in line):
-            m = re.match(r'(\d{2}/\d{2}) .*CHECK DEPOSIT.* ([0-9,.]+)', line)
+        if in_activity and (template.check_label in line):
+            m = template.check_re.match(line)
             if m:
                 checks.append({
                     'date': m.group(1),
@@ -71,24 +119,94 @@ def extract_checks(lines):
                 })
     return checks
 
-def ocr_pdf(pdf_path):
-    images = convert_from_path(pdf_path)
-    texts = [pytesseract.image_to_string(img) for img in images]
-    return texts
+def page_count(pdf_path):
+    if is_path(pdf_path):
+        return pdfinfo_from_path(pdf_path)['Pages']
+    return pdfinfo_from_bytes(bytes(pdf_path))['Pages']
 
-def main():
-    start = time.time()
-    texts = ocr_pdf(PDF_PATH)
+def rasterize(pdf_path, **kwargs):
+    if is_path(pdf_path):
+        return convert_from_path(pdf_path, **kwargs)
+    return convert_from_bytes(bytes(pdf_path), **kwargs)
+
+def _ocr_batch_timed(pdf_path, page_numbers, dpi=DEFAULT_DPI, preprocess=False, crops=None, engine=DEFAULT_ENGINE):
+    # Rasterizes the batch one page at a time and hands the engine NumPy arrays in one call, so a
+    # worker holds at most one batch of page images. Returns (text, rasterize_s, ocr_s) per page;
+    # timings travel with the text since workers cannot see the parent's recorder.
+    start = time.perf_counter()
+    images = []
+    for page_no, crop in zip(page_numbers, crops or [None] * len(page_numbers)):
+        pages = rasterize(pdf_path, dpi=dpi, first_page=page_no, last_page=page_no, grayscale=preprocess)
+        if not pages:
+            images.append(None)
+            continue
+        images.append(prepare(pages[0], crop=crop) if preprocess else np.asarray(pages[0]))
+        pages[0].close()
+    rasterized = time.perf_counter()
+    texts = iter(get_engine(engine).recognize([image for image in images if image is not None]))
+    texts = ['' if image is None else next(texts) for image in images]
+    n = len(page_numbers)
+    return [(text, (rasterized - start) / n, (time.perf_counter() - rasterized) / n) for text in texts]
+
+def _ocr_page_timed(pdf_path, page_no, dpi=DEFAULT_DPI, preprocess=False, crop=None, engine=DEFAULT_ENGINE):
+    return _ocr_batch_timed(pdf_path, [page_no], dpi, preprocess, [crop], engine)[0]
+
+def ocr_page(pdf_path, page_no, dpi=DEFAULT_DPI, engine=DEFAULT_ENGINE):
+    return _ocr_page_timed(pdf_path, page_no, dpi, engine=engine)[0]
+
+def _record_page(timed_page):
+    text, rasterize_seconds, ocr_seconds = timed_page
+    add_span('rasterize', rasterize_seconds)
+    add_span('ocr', ocr_seconds)
+    count('pages')
+    return text
+
+def iter_ocr_pages(pdf_path, page_numbers=None, dpi=DEFAULT_DPI, workers=None, preprocess=False, crops=None,
+                   engine=DEFAULT_ENGINE):
+    # Yields page texts in page order while the worker pool keeps OCRing the pages after them.
+    # `crops` maps a page number to the fraction of the page height (from the top) to keep.
+    # Pages go to the engine in batches of its batch_size (1 for tesseract).
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown OCR engine {engine!r}, expected one of {sorted(ENGINES)}")
+    if not is_path(pdf_path):
+        # Worker processes receive the document by pickle, which takes bytes but not memoryviews
+        pdf_path = bytes(pdf_path)
+    if page_numbers is None:
+        page_numbers = range(1, page_count(pdf_path) + 1)
+    page_numbers = list(page_numbers)
+    size = ENGINES[engine].batch_size
+    batches = [page_numbers[i:i + size] for i in range(0, len(page_numbers), size)]
+    batch_crops = [[(crops or {}).get(page_no) for page_no in batch] for batch in batches]
+    workers = workers or ENGINES[engine].default_workers
+    if workers == 1 or len(batches) <= 1:
+        for batch, crop in zip(batches, batch_crops):
+            for timed_page in _ocr_batch_timed(pdf_path, batch, dpi, preprocess, crop, engine):
+                yield _record_page(timed_page)
+        return
+    n = len(batches)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for timed_batch in executor.map(_ocr_batch_timed, [pdf_path] * n, batches, [dpi] * n,
+                                        [preprocess] * n, batch_crops, [engine] * n):
+            for timed_page in timed_batch:
+                yield _record_page(timed_page)
+
+def ocr_pdf(pdf_path, dpi=DEFAULT_DPI, workers=None, engine=DEFAULT_ENGINE):
+    return list(iter_ocr_pages(pdf_path, dpi=dpi, workers=workers, engine=engine))
+
+def parse_pages(pages, template=None):
     all_lines = []
-    for text in texts:
-        all_lines.extend(text.splitlines())
+    for page_lines in pages:
+        all_lines.extend(page_lines)
     # Debug: print all lines for tuning
     # for i, line in enumerate(all_lines):
     #     print(f"{i:03}: {repr(line)}")
-    name, address = extract_customer_info(all_lines)
-    statement_period = extract_statement_period(all_lines)
-    account_summary = extract_account_summary(all_lines)
-    checks = extract_checks(all_lines)
+    with span('identify'):
+        template = templates.get_template(template) if template else templates.identify(pages[0] if pages else [])
+    with span('parse'):
+        name, address = extract_customer_info(all_lines, template)
+        statement_period = extract_statement_period(all_lines, template)
+        account_summary = extract_account_summary(all_lines, template)
+        checks = extract_checks(all_lines, template)
     result = {
         'customer_name': name,
         'customer_address': address,
@@ -96,9 +214,111 @@ def main():
         'account_summary': account_summary,
         'checks': checks
     }
+    return result
+
+def header_failures(result, fields):
+    failed = []
+    if 'customer_name' in fields and not result['customer_name']:
+        failed.append('customer_name')
+    if 'customer_address' in fields and not result['customer_address']:
+        failed.append('customer_address')
+    if 'statement_period' in fields and not PERIOD_VALUE_RE.fullmatch(result['statement_period'] or ''):
+        failed.append('statement_period')
+    if 'account_summary' in fields:
+        summary = result['account_summary']
+        if len(summary) < MIN_SUMMARY_ENTRIES or not all(SUMMARY_VALUE_RE.fullmatch(v) for v in summary.values()):
+            failed.append('account_summary')
+    return failed
+
+def selected_pages(pdf_path, fields):
+    # 1-based page numbers that can hold `fields`, or None for every page
+    if fields is None:
+        return None
+    if field_pages.header_only(fields):
+        return [1]
+    return [i + 1 for i in field_pages.page_indices(fields, page_count(pdf_path))]
+
+def page_needs_retry(page_no, lines, fields, template=TD_BANK):
+    fields = fields or FIELDS
+    if page_no == 1 and header_failures(parse_pages([lines], template), fields):
+        return True
+    # A CHECK DEPOSIT line the check pattern cannot read usually means a garbled date or amount
+    if 'checks' in fields:
+        return any(template.check_label in line and not template.check_re.match(line) for line in lines)
+    return False
+
+def ocr_adaptive(pdf_path, fields=None, dpis=ADAPTIVE_DPIS, workers=None, template=None, engine=DEFAULT_ENGINE):
+    # Binarized, deskewed OCR at the lowest resolution first; only pages whose fields fail
+    # validation are rasterized again at the next resolution. When only header fields are
+    # requested, just the top of page 1 is OCR'd.
+    page_numbers = selected_pages(pdf_path, fields) or list(range(1, page_count(pdf_path) + 1))
+    crops = {1: HEADER_CROP} if field_pages.header_only(fields) else None
+    template = templates.get_template(template) if template else None
+    pages = {}
+    retry = page_numbers
+    for i, dpi in enumerate(dpis):
+        with span(f'ocr_pass_{dpi}dpi'):
+            texts = list(iter_ocr_pages(pdf_path, retry, dpi=dpi, workers=workers, preprocess=True, crops=crops,
+                                        engine=engine))
+        for page_no, text in zip(retry, texts):
+            pages[page_no] = text.splitlines()
+        if i == len(dpis) - 1:
+            break
+        if template is None:
+            template = templates.identify(pages[page_numbers[0]])
+        retry = [page_no for page_no in retry if page_needs_retry(page_no, pages[page_no], fields, template)]
+        count(f'escalated_pages_{dpis[i + 1]}dpi', len(retry))
+        if not retry:
+            break
+    return [pages[page_no] for page_no in page_numbers]
+
+def extract_pdf_data(pdf_path, dpi=DEFAULT_DPI, workers=None, cache=None, adaptive=False, fields=None, template=None,
+                     engine=DEFAULT_ENGINE):
+    # Only the pages that can hold `fields` are rasterized and OCR'd
+    fields = field_pages.check_fields(fields, FIELDS)
+    if adaptive:
+        def extract(path):
+            pages = ocr_adaptive(path, fields=fields, workers=workers, template=template, engine=engine)
+            return pages, field_pages.select(parse_pages(pages, template), fields)
+        version = f"{EXTRACTOR_VERSION}-adaptive{'-'.join(map(str, ADAPTIVE_DPIS))}"
+    else:
+        def extract(path):
+            texts = iter_ocr_pages(path, selected_pages(path, fields), dpi=dpi, workers=workers, engine=engine)
+            pages = [text.splitlines() for text in texts]
+            return pages, field_pages.select(parse_pages(pages, template), fields)
+        # OCR output depends on the rasterization resolution, so it is part of the cache version
+        version = f"{EXTRACTOR_VERSION}-dpi{dpi}"
+    if engine != DEFAULT_ENGINE:
+        version = f"{version}-{engine}"
+    version = templates.cache_version(field_pages.cache_version(version, fields), template)
+    return cached_extract(cache, pdf_path, EXTRACTOR_NAME, version, extract)
+
+def main(pdf_path=PDF_PATH, dpi=DEFAULT_DPI, workers=None, adaptive=False, fields=None, args=None,
+         engine=DEFAULT_ENGINE):
+    start = time.time()
+    with instrument.recording_from_args(args, extractor=EXTRACTOR_NAME):
+        result = extract_pdf_data(pdf_path, dpi=dpi, workers=workers, cache=ResultCache.from_env(),
+                                  adaptive=adaptive, fields=fields, engine=engine)
     print(json.dumps(result, indent=2, ensure_ascii=False))
     elapsed = time.time() - start
     print(f"\n[tesseract_spacy] Extraction completed in {elapsed:.2f} seconds.")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Extract TD Bank statement data from scanned PDFs with tesseract.')
+    parser.add_argument('pdf_path', nargs='?', default=PDF_PATH)
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI, help='rasterization resolution')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default=DEFAULT_ENGINE,
+                        help='OCR backend: tesseract (one subprocess per page) or easyocr (batched, CPU)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of OCR worker processes (default: CPU count for tesseract, 1 for easyocr)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help=f"binarize and deskew pages, OCR at {ADAPTIVE_DPIS[0]} dpi and retry failed pages "
+                             f"at {ADAPTIVE_DPIS[-1]} dpi (ignores --dpi)")
+    field_pages.add_arguments(parser, FIELDS)
+    instrument.add_arguments(parser)
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    args = parse_args()
+    main(args.pdf_path, dpi=args.dpi, workers=args.workers, adaptive=args.adaptive, fields=args.fields, args=args,
+         engine=args.engine)
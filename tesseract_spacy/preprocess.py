@@ -0,0 +1,57 @@
+import cv2
+import numpy as np
+
+# Estimated skew outside this range is treated as noise (or as a misdetection) and left alone
+MIN_SKEW_DEGREES = 0.1
+MAX_SKEW_DEGREES = 10
+# Below this many ink pixels there is not enough text to estimate skew from
+MIN_INK_PIXELS = 500
+
+
+def to_gray(image):
+    # Accepts a PIL image or a numpy array
+    array = np.asarray(image)
+    if array.ndim == 3:
+        return cv2.cvtColor(array, cv2.COLOR_RGB2GRAY)
+    return array
+
+
+def binarize(gray):
+    # A 3x3 median removes scanner speckle, then Otsu picks the threshold from the histogram
+    _, binary = cv2.threshold(cv2.medianBlur(gray, 3), 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return binary
+
+
+def estimate_skew(binary):
+    ys, xs = np.nonzero(binary == 0)
+    if len(xs) < MIN_INK_PIXELS:
+        return 0.0
+    points = np.column_stack((xs, ys)).astype(np.float32)
+    angle = cv2.minAreaRect(points)[-1]
+    # minAreaRect reports angles in (0, 90] (OpenCV >= 4.5) or [-90, 0); fold into [-45, 45]
+    if angle > 45:
+        angle -= 90
+    elif angle < -45:
+        angle += 90
+    return angle
+
+
+def deskew(binary, angle):
+    if not MIN_SKEW_DEGREES <= abs(angle) <= MAX_SKEW_DEGREES:
+        return binary
+    h, w = binary.shape
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    return cv2.warpAffine(binary, matrix, (w, h), flags=cv2.INTER_NEAREST, borderValue=255)
+
+
+def crop_top(array, fraction):
+    if fraction is None or fraction >= 1:
+        return array
+    return array[:max(1, int(array.shape[0] * fraction))]
+
+
+def prepare(image, crop=None):
+    # Grayscale -> crop -> binarize -> deskew, returned as a uint8 array pytesseract accepts as-is.
+    # Cropping first keeps the thresholding and rotation to the pixels that are actually OCR'd.
+    binary = binarize(crop_top(to_gray(image), crop))
+    return deskew(binary, estimate_skew(binary))
@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import multiprocessing
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.synthetic import make_statement, render
+from statement_extractor import extract, extract_many
+
+# pdfplumber takes over a second on this statement, so with one worker process the third of
+# three documents waits for two others before it starts
+TRANSACTIONS = 400
+
+
+def statement_bytes(seed):
+    doc = render(make_statement(random.Random(seed), TRANSACTIONS))
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def records(sources, **options):
+    async def collect():
+        return [record async for record in extract_many(sources, method='plumber', process_workers=1, **options)]
+    return asyncio.run(collect())
+
+
+def test_timeout_starts_when_the_job_starts():
+    sources = [statement_bytes(seed) for seed in range(3)]
+    start = time.perf_counter()
+    assert extract(sources[0], method='plumber')
+    seconds = time.perf_counter() - start
+    results = records(sources, timeout=seconds * 2 + 1, max_concurrency=3)
+    assert [record.get('error') for record in results] == [None] * 3
+
+
+def test_timeout_stops_the_process():
+    start = time.perf_counter()
+    results = records([statement_bytes(0)], timeout=0.05)
+    assert results[0]['error'] == 'TimeoutError: no result after 0.05 seconds'
+    time.sleep(0.5)
+    assert multiprocessing.active_children() == []
+    # The worker is terminated instead of finishing the statement in the background
+    assert time.perf_counter() - start < 5
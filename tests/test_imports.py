@@ -0,0 +1,43 @@
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.check_imports import FAST_METHODS, run_cli
+from benchmarks.synthetic import generate_corpus
+from statement_extractor.cli import OCR_AND_ML_MODULES
+
+# The digital fast path must never import docling, torch or an OCR stack. Each case runs in a
+# fresh interpreter, since this test process may already have imported any of them.
+
+EXTRACT_AND_REPORT = '''
+import sys, json
+from statement_extractor import extract
+extract(sys.argv[1], method=sys.argv[2], cache=None)
+print(json.dumps(sorted(name for name in sys.modules if name.split('.')[0] in sys.argv[3].split(','))))
+'''
+
+
+@pytest.fixture(scope='module')
+def digital_pdf(tmp_path_factory):
+    return generate_corpus(str(tmp_path_factory.mktemp('corpus')), n=1, seed=0, scanned_ratio=0)[0]['pdf']
+
+
+@pytest.mark.parametrize('method', FAST_METHODS)
+def test_extract_does_not_import_ocr_or_ml(digital_pdf, method):
+    proc = subprocess.run([sys.executable, '-c', EXTRACT_AND_REPORT, digital_pdf, method, ','.join(OCR_AND_ML_MODULES)],
+                          cwd=ROOT_DIR, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    assert json.loads(proc.stdout.strip().splitlines()[-1]) == []
+
+
+@pytest.mark.parametrize('method', FAST_METHODS)
+def test_cli_does_not_import_ocr_or_ml(digital_pdf, method):
+    report = run_cli(method, digital_pdf)
+    assert [name for name in report['heavy_modules'] if name in OCR_AND_ML_MODULES] == []
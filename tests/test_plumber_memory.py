@@ -0,0 +1,66 @@
+import gc
+import os
+import sys
+import random
+import tracemalloc
+
+import pytest
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.synthetic import make_statement, render
+from plumber.extract_pdf_text import EXTRACT_MODES, MemoryLimitExceeded, extract_pdf_data, iter_page_lines
+
+
+# Transactions in the small and large statements (5 and 54 pages) and the largest allowed ratio
+# of their low-memory peaks; the default mode grows about 13x between the two
+SMALL, LARGE = 50, 800
+MAX_GROWTH = 2.0
+
+
+def statement_bytes(n_transactions):
+    doc = render(make_statement(random.Random(0), n_transactions))
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def peak_bytes(data, **options):
+    # tracemalloc peak of reading every page; the lines are dropped as they come
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for _ in iter_page_lines(data, **options):
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.fixture(scope='module')
+def statement_pdf():
+    # Several pages, so low-memory mode has pages to release between reads
+    return statement_bytes(200)
+
+
+def test_rss_ceiling_raises(statement_pdf):
+    with pytest.raises(MemoryLimitExceeded) as excinfo:
+        list(iter_page_lines(statement_pdf, low_memory=True, max_rss_mb=1))
+    assert excinfo.value.page_no == 1
+    assert excinfo.value.rss > excinfo.value.limit
+
+
+@pytest.mark.parametrize('mode', EXTRACT_MODES)
+def test_low_memory_output_matches_default(statement_pdf, mode):
+    assert list(iter_page_lines(statement_pdf, mode=mode, low_memory=True)) == \
+        list(iter_page_lines(statement_pdf, mode=mode))
+    assert extract_pdf_data(statement_pdf, mode=mode, low_memory=True) == extract_pdf_data(statement_pdf, mode=mode)
+
+
+def test_low_memory_peak_stays_flat():
+    small = peak_bytes(statement_bytes(SMALL), low_memory=True)
+    large = peak_bytes(statement_bytes(LARGE), low_memory=True)
+    assert large <= small * MAX_GROWTH, \
+        f"low-memory peak grew {large / small:.2f}x ({small / 2**20:.1f} -> {large / 2**20:.1f} MB)"
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from statement_extractor.pool import imap_unordered
+
+CRASH, FAIL = 3, 5
+
+
+def square(n):
+    if n == CRASH:
+        # A worker killed outright, like the OOM killer does
+        os._exit(1)
+    if n == FAIL:
+        raise ValueError(n)
+    return n * n
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_only_the_crashing_item_fails(workers):
+    outcomes = {item[0]: (result, error) for item, result, error in
+                imap_unordered(square, [(n,) for n in range(10)], workers)}
+    assert type(outcomes.pop(CRASH)[1]).__name__ == 'BrokenProcessPool'
+    assert type(outcomes.pop(FAIL)[1]) is ValueError
+    assert outcomes == {n: (n * n, None) for n in outcomes}
+    assert len(outcomes) == 8